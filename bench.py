@@ -0,0 +1,439 @@
+"""Offline load test for the application bot.
+
+Drives the real handlers in main.py against a simulated Discord layer (fake users, guilds,
+channels and interactions with injectable REST latency and rate limits) and reports
+throughput, p50/p99 latency and peak memory for each scenario. Nothing talks to Discord.
+
+    python bench.py --applicants 2000 --concurrency 500 --latency-ms 40
+    STORAGE_BACKEND=sqlite DATABASE_PATH=bench.db python bench.py --route-rate 5 --global-rate 50
+    LOG_BATCH_WINDOW=2 python bench.py --scenarios questionnaire review --route-rate 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("DISCORD_TOKEN", "offline-benchmark")
+os.environ.setdefault("PORT", "0")
+# Every simulated applicant clicks within a few milliseconds, far past any real server's rate
+os.environ.setdefault("APPLY_GUILD_RATE", "0")
+
+import discord
+
+import main
+
+# Simulated Discord layer
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.tokens = burst
+        self.burst = burst
+        self.updated = time.perf_counter()
+
+    async def take(self) -> bool:
+        # Waits for a token like discord.py does for an exhausted bucket; True if it had to wait
+        waited = False
+        while True:
+            now = time.perf_counter()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            waited = True
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class FakeDiscord:
+    # Every simulated REST call goes through here: injected latency plus per-route and global buckets
+    def __init__(self, latency: float, jitter: float, route_rate: float, global_rate: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.route_rate = route_rate
+        self.buckets = {}
+        self.global_bucket = TokenBucket(global_rate, int(global_rate)) if global_rate else None
+        self.calls = 0
+        self.rate_limited = 0
+        self.next_id = 1_000_000
+
+    def snowflake(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    async def call(self, route: str, global_limit: bool = True):
+        self.calls += 1
+        if self.route_rate:
+            bucket = self.buckets.get(route)
+            if bucket is None:
+                bucket = self.buckets[route] = TokenBucket(self.route_rate, 5)
+            if await bucket.take():
+                self.rate_limited += 1
+        if global_limit and self.global_bucket and await self.global_bucket.take():
+            self.rate_limited += 1
+        if self.latency:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+class FakeMessage:
+    def __init__(self, fake: FakeDiscord, author=None, content: str = None, channel=None, guild=None):
+        self.id = fake.snowflake()
+        self.author = author
+        self.content = content
+        self.channel = channel
+        self.guild = guild
+
+class FakeUser:
+    def __init__(self, fake: FakeDiscord, user_id: int, name: str):
+        self.fake = fake
+        self.id = user_id
+        self.name = name
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+        self.inbox = asyncio.Queue()
+        self.has_dm = False
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content: str = None, *, embed=None, view=None):
+        if not self.has_dm:
+            # Opening a DM channel is one shared route for the whole bot
+            await self.fake.call("POST /users/@me/channels")
+            self.has_dm = True
+        await self.fake.call(f"dm:{self.id}")
+        message = FakeMessage(self.fake, content=content)
+        self.inbox.put_nowait((time.perf_counter(), content, embed))
+        return message
+
+class FakeRole:
+    def __init__(self, fake: FakeDiscord, name: str, members: list):
+        self.id = fake.snowflake()
+        self.name = name
+        self.members = members
+
+class FakeTextChannel:
+    def __init__(self, fake: FakeDiscord, guild, name: str):
+        self.fake = fake
+        self.id = fake.snowflake()
+        self.guild = guild
+        self.name = name
+        self.sent = 0
+
+    async def send(self, content: str = None, *, embed=None, embeds=None, view=None):
+        await self.fake.call(f"channel:{self.id}")
+        self.sent += 1
+        return FakeMessage(self.fake, content=content, channel=self, guild=self.guild)
+
+class FakeGuild:
+    def __init__(self, fake: FakeDiscord, guild_id: int, reviewers: int):
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.chunked = True
+        self.members_by_id = {}
+        for i in range(reviewers):
+            member = FakeUser(fake, guild_id * 1000 + i, f"dev{i}")
+            member.guild = self
+            self.members_by_id[member.id] = member
+        self.roles = [FakeRole(fake, main.DEV_ROLE_NAME, list(self.members_by_id.values()))]
+        self.text_channels = [FakeTextChannel(fake, self, "general"), FakeTextChannel(fake, self, main.LOG_CHANNEL_NAME)]
+        self.channels_by_id = {channel.id: channel for channel in self.text_channels}
+
+    def get_member(self, user_id: int):
+        return self.members_by_id.get(user_id)
+
+    def get_channel(self, channel_id: int):
+        return self.channels_by_id.get(channel_id)
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _respond(self):
+        if self.done:
+            raise discord.InteractionResponded(self.interaction)
+        self.interaction.responded_at = time.perf_counter()
+        await self.interaction.fake.call(f"interaction:{self.interaction.id}", global_limit=False)
+        self.done = True
+
+    async def send_message(self, content: str = None, *, embed=None, view=None, ephemeral: bool = False):
+        await self._respond()
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        await self._respond()
+
+    async def send_modal(self, modal):
+        await self._respond()
+        self.interaction.modal = modal
+
+    async def edit_message(self, *, embed=None, view=None):
+        await self._respond()
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content: str = None, *, embed=None, view=None, ephemeral: bool = False):
+        await self.interaction.fake.call(f"webhook:{self.interaction.id}", global_limit=False)
+
+class FakeInteraction:
+    def __init__(self, fake: FakeDiscord, user: FakeUser, guild: FakeGuild = None):
+        self.fake = fake
+        self.id = fake.snowflake()
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.created = time.perf_counter()
+        self.responded_at = None
+        self.modal = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    @property
+    def response_latency(self) -> float:
+        return (self.responded_at or time.perf_counter()) - self.created
+
+class FakeGateway:
+    # Stands in for the connected client: owns the guilds and users and answers bot lookups
+    def __init__(self, fake: FakeDiscord, guild_count: int, reviewers: int):
+        self.fake = fake
+        self.guilds = {guild_id: FakeGuild(fake, guild_id, reviewers) for guild_id in range(1, guild_count + 1)}
+        self.users = {}
+        main.bot.get_guild = self.guilds.get
+        main.bot.get_user = self.users.get
+
+    def user(self, user_id: int) -> FakeUser:
+        user = self.users.get(user_id)
+        if user is None:
+            user = self.users[user_id] = FakeUser(self.fake, user_id, f"applicant{user_id}")
+        return user
+
+    async def deliver_dm(self, user: FakeUser, content: str):
+        # A DM arriving over the gateway, dispatched to the bot's on_message listener
+        await main.on_message(FakeMessage(self.fake, author=user, content=content))
+
+# Measurement
+
+class Result:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.extra = {}
+        self.ops = 0
+        self.wall = 0.0
+        self.peak_memory = 0
+        self.errors = 0
+
+    def percentile(self, values: list, p: float) -> float:
+        if not values:
+            return 0.0
+        values = sorted(values)
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+    def report(self) -> str:
+        line = (
+            f"{self.name:<16} {self.ops:>7} ops  {self.ops / self.wall if self.wall else 0:>9.1f} ops/s  "
+            f"p50 {self.percentile(self.latencies, 50) * 1000:>8.2f}ms  p99 {self.percentile(self.latencies, 99) * 1000:>8.2f}ms  "
+            f"peak {self.peak_memory / 1024 / 1024:>7.2f} MiB  errors {self.errors}"
+        )
+        for key, value in self.extra.items():
+            line += f"\n{'':<16} {key}: {value}"
+        return line
+
+async def measured(name: str, scenario):
+    result = Result(name)
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    await scenario(result)
+    result.wall = time.perf_counter() - start
+    result.peak_memory = tracemalloc.get_traced_memory()[1]
+    return result
+
+async def bounded(concurrency: int, jobs):
+    semaphore = asyncio.Semaphore(concurrency)
+    async def run(job):
+        async with semaphore:
+            return await job
+    return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+
+def count_errors(result: Result, outcomes: list):
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            result.errors += 1
+            if result.errors == 1:
+                print(f"  first error in {result.name}: {type(outcome).__name__}: {outcome}", file=sys.stderr)
+
+# Scenarios
+
+def applicant_ids(args) -> list:
+    return [10_000_000 + i for i in range(args.applicants)]
+
+def guild_for(gateway: FakeGateway, user_id: int) -> FakeGuild:
+    return gateway.guilds[1 + user_id % len(gateway.guilds)]
+
+async def select_scenario(args, gateway: FakeGateway, result: Result):
+    async def pick(user_id: int):
+        guild = guild_for(gateway, user_id)
+        interaction = FakeInteraction(gateway.fake, gateway.user(user_id), guild)
+        select = main.RoleSelect(guild.id)
+        select._values = [args.role]
+        start = time.perf_counter()
+        await select.callback(interaction)
+        result.latencies.append(time.perf_counter() - start)
+        result.ops += 1
+    count_errors(result, await bounded(args.concurrency, [pick(user_id) for user_id in applicant_ids(args)]))
+
+async def questionnaire_scenario(args, gateway: FakeGateway, result: Result):
+    answer_latencies = []
+
+    async def apply(user_id: int):
+        guild = guild_for(gateway, user_id)
+        user = gateway.user(user_id)
+        while not user.inbox.empty():
+            user.inbox.get_nowait()
+        view = main.StartApplicationView(args.role, guild.id, main.guild_configs.get(guild.id).role(args.role).questions)
+        interaction = FakeInteraction(gateway.fake, user, guild)
+        start = time.perf_counter()
+        run = asyncio.create_task(view.start.callback(interaction))
+        answered = None
+        for _ in main.questions[args.role]:
+            received, content, embed = await user.inbox.get()
+            if answered is not None:
+                # Time from the applicant's answer to the next question landing in their DMs
+                answer_latencies.append(received - answered)
+            if args.think_ms:
+                await asyncio.sleep(args.think_ms / 1000)
+            answered = time.perf_counter()
+            await gateway.deliver_dm(user, f"Answer from {user_id}")
+        await run
+        result.latencies.append(time.perf_counter() - start)
+        result.ops += 1
+
+    count_errors(result, await bounded(args.concurrency, [apply(user_id) for user_id in applicant_ids(args)]))
+    await asyncio.gather(*main.notifier.tasks)
+    result.extra["answer -> next question"] = (
+        f"p50 {result.percentile(answer_latencies, 50) * 1000:.2f}ms  p99 {result.percentile(answer_latencies, 99) * 1000:.2f}ms"
+    )
+    result.extra["pending after run"] = sum(main.store.pending_counts().values())
+    result.extra["REST calls so far"] = gateway.fake.calls
+
+async def review_scenario(args, gateway: FakeGateway, result: Result):
+    pending_by_user = {
+        user_id: info for guild_id in gateway.guilds for user_id, info in main.store.pending_for_guild(guild_id)
+    }
+
+    async def review(user_id: int, index: int):
+        pending = pending_by_user.get(user_id)
+        if not pending:
+            return
+        guild = gateway.guilds[pending.guild_id]
+        moderator = guild.roles[0].members[index % len(guild.roles[0].members)]
+        action = "accept" if index % 2 else "decline"
+        button = main.ReviewButton(action, guild.id, user_id, pending.submission_id)
+        interaction = FakeInteraction(gateway.fake, moderator, guild)
+        await button.callback(interaction)
+        result.latencies.append(interaction.response_latency)
+        result.ops += 1
+
+    jobs = [review(user_id, index) for index, user_id in enumerate(applicant_ids(args))]
+    count_errors(result, await bounded(args.concurrency, jobs))
+    drain_start = time.perf_counter()
+    main.log_batcher.close()
+    await main.outbound.queue.join()
+    result.extra["outbound drain"] = f"{time.perf_counter() - drain_start:.2f}s for DMs and log posts"
+    result.extra["log channel messages"] = sum(guild.text_channels[1].sent for guild in gateway.guilds.values())
+
+async def history_scenario(args, gateway: FakeGateway, result: Result):
+    async def lookup(user_id: int, index: int):
+        guild = guild_for(gateway, user_id)
+        interaction = FakeInteraction(gateway.fake, guild.roles[0].members[0], guild)
+        start = time.perf_counter()
+        await main.application_history_command.callback(interaction, gateway.user(user_id), index % 2 == 0)
+        result.latencies.append(time.perf_counter() - start)
+        result.ops += 1
+
+    ids = applicant_ids(args)
+    jobs = [lookup(random.choice(ids), index) for index in range(args.history_queries)]
+    count_errors(result, await bounded(args.concurrency, jobs))
+
+async def resume_scenario(args, gateway: FakeGateway, result: Result):
+    # Applicants whose checkpoint already holds every answer (the first submission failed) must be
+    # submitted on Resume rather than shown an empty form page
+    async def resume(user_id: int):
+        guild = guild_for(gateway, user_id)
+        qlist = main.guild_configs.get(guild.id).role(args.role).questions
+        main.store.start_checkpoint(user_id, guild.id, args.role)
+        for position, question in enumerate(qlist):
+            main.store.add_checkpoint_answer(user_id, position, question, f"Answer from {user_id}")
+        view = main.StartApplicationView(args.role, guild.id, qlist, resumable=True)
+        interaction = FakeInteraction(gateway.fake, gateway.user(user_id), guild)
+        start = time.perf_counter()
+        await view.resume.callback(interaction)
+        result.latencies.append(time.perf_counter() - start)
+        if interaction.modal is not None:
+            raise AssertionError(f"resume opened a form with {len(interaction.modal.inputs)} question(s) left")
+        if main.store.get_checkpoint(user_id):
+            raise AssertionError("resume left the completed checkpoint behind")
+        result.ops += 1
+
+    ids = [20_000_000 + i for i in range(args.applicants)]
+    count_errors(result, await bounded(args.concurrency, [resume(user_id) for user_id in ids]))
+    await asyncio.gather(*main.notifier.tasks)
+
+SCENARIOS = {
+    "select": select_scenario,
+    "questionnaire": questionnaire_scenario,
+    "review": review_scenario,
+    "history": history_scenario,
+    "resume": resume_scenario,
+}
+
+async def run(args):
+    fake = FakeDiscord(args.latency_ms / 1000, args.jitter_ms / 1000, args.route_rate, args.global_rate)
+    gateway = FakeGateway(fake, args.guilds, args.reviewers)
+    main.sessions.timers.tick = min(main.sessions.timers.tick, 0.1)
+    await main.store.start()
+    main.outbound.start()
+
+    tracemalloc.start()
+    print(
+        f"{args.applicants} applicants, concurrency {args.concurrency}, {args.guilds} guild(s), "
+        f"latency {args.latency_ms}ms (+{args.jitter_ms}ms jitter), store {type(main.store).__name__}"
+    )
+    results = []
+    for name in args.scenarios:
+        result = await measured(name, lambda result, name=name: SCENARIOS[name](args, gateway, result))
+        print(result.report())
+        results.append(result)
+    print(f"REST calls: {fake.calls}, rate-limit waits: {fake.rate_limited}")
+
+    await main.outbound.close()
+    await main.store.close()
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applicants", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500, help="how many applicants/reviewers act at once")
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--reviewers", type=int, default=5, help="Dev-role members per guild")
+    parser.add_argument("--role", default="Staff", choices=sorted(main.questions))
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated REST latency")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--route-rate", type=float, default=0, help="requests per second per route (0 = unlimited)")
+    parser.add_argument("--global-rate", type=float, default=0, help="global requests per second (0 = unlimited)")
+    parser.add_argument("--think-ms", type=float, default=0, help="applicant delay before each answer")
+    parser.add_argument("--history-queries", type=int, default=1000)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args))
@@ -3,37 +3,1348 @@ from discord.ext import commands
 from discord import app_commands, ui
 import os
 from dotenv import load_dotenv
-from flask import Flask
-from threading import Thread
+from aiohttp import web
 import asyncio
-from datetime import datetime, timedelta
+import math
+from datetime import datetime, timedelta, timezone
 import random
+import sqlite3
+import itertools
+import heapq
+import bisect
+import time
+import functools
+import logging
+import hashlib
+import json
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from enum import Enum
+import array
+import sys
+import csv
+import gzip
+import io
+import tempfile
+import subprocess
+import signal
+import re
+import contextlib
+import unicodedata
+import threading
+import cProfile
+import pstats
+import hmac
+from typing import Literal
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 DEV_ROLE_NAME = "Dev"
 LOG_CHANNEL_NAME = "application-logs"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")  # "memory" or "sqlite"
+DATABASE_PATH = os.getenv("DATABASE_PATH", "applications.db")
+SHARED_BUSY_TIMEOUT = 0.05  # seconds a shard worker's event loop waits for another worker's write lock before retrying later
+GLOBAL_SCOPE = 0  # guild_id used for global bans/declines
+HEALTH_PORT = int(os.getenv("PORT", 8080))  # health/metrics server; falls back to the next port if busy
+HEARTBEAT_STALE_AFTER = 90  # seconds without a heartbeat ack before /healthz reports unhealthy
+METRICS_SINK = os.getenv("METRICS_SINK", "")  # "log" prints the slowest handlers every METRICS_FLUSH_INTERVAL
+METRICS_FLUSH_INTERVAL = 60
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # bearer token for the admin HTTP routes; unset disables them
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # where /debug_profile writes its output
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples in "collapsed" mode
+PROFILE_MAX_SECONDS = 300
+QUESTION_TIMEOUT = 300  # seconds an applicant has to answer each question
+QUESTIONNAIRE_MODE = os.getenv("QUESTIONNAIRE_MODE", "dm")  # "dm" (one question per DM) or "modal" (form pages)
+# "none": one gateway connection. "auto": AutoShardedBot in this process. "processes": launch
+# SHARD_PROCESSES workers, each running a slice of the shards against the shared SQLite database.
+SHARD_MODE = os.getenv("SHARD_MODE", "none")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0)) or None  # total shards; Discord's recommendation if unset
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("SHARD_IDS", "").split(",") if shard_id] or None  # set by the launcher
+SHARD_PROCESSES = int(os.getenv("SHARD_PROCESSES", os.cpu_count() or 1))
+WORKER_STOP_TIMEOUT = 60  # seconds a shard worker gets to flush and close before it is killed
+SHARED_STATE = SHARD_MODE == "worker"  # other processes write to the same database
+if SHARED_STATE and QUESTIONNAIRE_MODE != "modal":
+    # DMs and their button clicks are delivered to shard 0 only, so a DM questionnaire started by
+    # another worker would never see the answers. Forms stay in the guild, on the guild's shard.
+    print("⚠️ Shard workers use modal questionnaires; DM answers only reach the worker running shard 0")
+    QUESTIONNAIRE_MODE = "modal"
+MODAL_PAGE_SIZE = 5  # Discord allows at most 5 text inputs per modal
+APPLY_USER_RATE = float(os.getenv("APPLY_USER_RATE", 4))  # application clicks per minute per user; 0 disables
+APPLY_USER_BURST = 3
+APPLY_GUILD_RATE = float(os.getenv("APPLY_GUILD_RATE", 120))  # application clicks per minute per server; 0 disables
+APPLY_GUILD_BURST = 60
+MAX_ACTIVE_SESSIONS = int(os.getenv("MAX_ACTIVE_SESSIONS", 200))  # DM questionnaires asking questions at once
+MAX_QUEUED_SESSIONS = int(os.getenv("MAX_QUEUED_SESSIONS", 1000))  # applicants waiting for a slot; more are turned away
+HISTORY_PAGE_SIZE = 10  # entries per /applicationhistory page
+BAN_PAGE_SIZE = 10  # entries per /applicationbans page
+GUILD_CONFIG_CACHE_SIZE = 2000  # guild configs kept in memory; the rest are reloaded on use
+STATS_WINDOW_HOURS = 24 * 7  # longest rolling window shown by /application_stats
+CHECKPOINT_TTL = timedelta(hours=24)  # unfinished applications are kept this long for resuming
+GLOBAL_DECLINE_COOLDOWN = timedelta(hours=float(os.getenv("GLOBAL_DECLINE_COOLDOWN_HOURS", 48)))
+DEFAULT_DECLINE_COOLDOWN = timedelta(hours=24)  # per server, changeable with /application_cooldown
+MEMBER_CACHE = os.getenv("MEMBER_CACHE", "full")  # "full" chunks every guild at startup, "lazy" caches Dev members only
+REVIEWER_INDEX_TTL = 3600  # lazy mode: seconds between re-checks of a guild's known Dev holders
+REVIEWER_DM_CONCURRENCY = 5  # reviewer DMs in flight at once per submission
+OUTBOUND_WORKERS = 4  # background senders for applicant DMs and log posts
+OUTBOUND_MAX_ATTEMPTS = 5
+DEAD_LETTER_RETENTION = timedelta(days=30)  # undeliverable DMs and log posts are kept this long for inspection
+PENDING_REMINDER_HOURS = float(os.getenv("PENDING_REMINDER_HOURS", 48))  # remind the log channel of applications waiting this long; 0 disables
+LOG_BATCH_WINDOW = float(os.getenv("LOG_BATCH_WINDOW", 0))  # seconds to collect decision logs into one message; 0 posts each
+COMMAND_SYNC_CACHE = os.getenv("COMMAND_SYNC_CACHE", ".command_sync.json")  # fingerprints of the last synced command trees
+DEV_GUILD_ID = int(os.getenv("DEV_GUILD_ID", 0)) or None  # also sync to this guild, where updates show up instantly
 
-# Flask app for keep-alive
-app = Flask('')
+# Storage backends. Both expose the same methods; global bans/declines live under GLOBAL_SCOPE.
+def to_epoch(date: datetime) -> float:
+    return date.replace(tzinfo=timezone.utc).timestamp()
 
-@app.route('/')
-def home():
-    return "Bot is running!"
+def from_epoch(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
 
-def run():
-    try:
-        app.run(host='0.0.0.0', port=8080)
-    except OSError:
-        # If port 8080 is busy, try 8081
-        app.run(host='0.0.0.0', port=8081)
+def epoch_now() -> int:
+    return int(time.time())
+
+def format_epoch(ts: int, fmt: str = "%Y-%m-%d %H:%M UTC") -> str:
+    return from_epoch(ts).strftime(fmt)
+
+# Records are slotted and immutable: a cached or shared record can never be changed under a reader.
+# Timestamps are whole epoch seconds, people are ids, and role names are interned.
+class Action(str, Enum):
+    ACCEPTED = "accepted"
+    DECLINED = "declined"
+
+@dataclass(slots=True, frozen=True)
+class HistoryEntry:
+    action: Action
+    role: str
+    date: int
+    moderator_id: int
+    reason: str = None
+    submitted: int = 0  # 0 when the submission time is unknown
+    legacy_moderator: str = None  # name stored by versions that predate moderator_id
+
+    @property
+    def moderator(self) -> str:
+        return f"<@{self.moderator_id}>" if self.moderator_id else (self.legacy_moderator or "unknown")
+
+@dataclass(slots=True, frozen=True)
+class BanRecord:
+    reason: str
+    date: int
+    username: str = None  # name when banned, for searching; None on bans from older versions
+    expires: int = 0  # 0 for permanent bans
+
+    def active(self, now: int) -> bool:
+        return not self.expires or self.expires > now
+
+@dataclass(slots=True, frozen=True)
+class PendingApplication:
+    submission_id: int
+    role_type: str
+    guild_id: int
+
+class HistoryColumns:
+    # Append-only, array-backed history: one machine-sized column per field instead of one object per
+    # decision. Roles are stored as codes into a small table and reasons sparsely, since most have none.
+    # HistoryEntry objects are only built for the rows a caller actually reads.
+    ACTIONS = list(Action)
+
+    def __init__(self):
+        self.guild_id = array.array("q")
+        self.user_id = array.array("q")
+        self.date = array.array("q")
+        self.moderator_id = array.array("q")
+        self.submitted = array.array("q")
+        self.action = array.array("B")
+        self.role = array.array("H")
+        self.roles = []      # role code: role name
+        self.role_codes = {}  # role name: role code
+        self.reasons = {}    # row: reason
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def append(self, guild_id: int, user_id: int, entry: HistoryEntry) -> int:
+        code = self.role_codes.get(entry.role)
+        if code is None:
+            code = self.role_codes[entry.role] = len(self.roles)
+            self.roles.append(sys.intern(entry.role))
+        row = len(self.date)
+        self.guild_id.append(guild_id)
+        self.user_id.append(user_id)
+        self.date.append(entry.date)
+        self.moderator_id.append(entry.moderator_id)
+        self.submitted.append(entry.submitted)
+        self.action.append(self.ACTIONS.index(entry.action))
+        self.role.append(code)
+        if entry.reason:
+            self.reasons[row] = entry.reason
+        return row
+
+    def entry(self, row: int) -> HistoryEntry:
+        return HistoryEntry(
+            self.ACTIONS[self.action[row]], self.roles[self.role[row]], self.date[row],
+            self.moderator_id[row], self.reasons.get(row), self.submitted[row]
+        )
+
+class BanList:
+    # One scope's bans. The dict keeps ban order for newest-first paging; names is a sorted
+    # (lowercase name, user_id) index, so a prefix search is two bisects and a slice.
+    def __init__(self):
+        self.bans = {}   # user_id: BanRecord, oldest first
+        self.names = []  # sorted (lowercase username, user_id)
+
+    def add(self, user_id: int, info: BanRecord):
+        self.remove(user_id)
+        self.bans[user_id] = info
+        if info.username:
+            bisect.insort(self.names, (info.username.lower(), user_id))
+
+    def remove(self, user_id: int):
+        info = self.bans.pop(user_id, None)
+        if info and info.username:
+            del self.names[bisect.bisect_left(self.names, (info.username.lower(), user_id))]
+        return info
+
+    def _name_range(self, prefix: str) -> tuple:
+        return bisect.bisect_left(self.names, (prefix,)), bisect.bisect_left(self.names, (prefix + "\U0010ffff",))
+
+    def count(self, name: str = None) -> int:
+        if name is None:
+            return len(self.bans)
+        lo, hi = self._name_range(name)
+        return hi - lo
+
+    def page(self, name: str, offset: int, limit: int) -> list:
+        if name is None:
+            return list(itertools.islice(reversed(self.bans.items()), offset, offset + limit))
+        lo, hi = self._name_range(name)
+        return [(user_id, self.bans[user_id]) for _, user_id in self.names[lo + offset:min(hi, lo + offset + limit)]]
+
+class MemoryStore:
+    # Default backend: plain dicts, nothing survives a restart.
+    def __init__(self):
+        self.banned = {}    # guild_id: BanList
+        self.ban_expiry = []  # heap of (expires, guild_id, user_id) for temporary bans
+        self.history = HistoryColumns()
+        self.history_rows = {}  # (guild_id, user_id): array of history rows, oldest first
+        self.user_history = {}  # user_id: array of history rows across all servers, oldest first
+        self.pending = {}   # guild_id: {submission_id: (user_id, PendingApplication)}, oldest first
+        self.settings = {}  # guild_id: {key: str}
+        self.dead_letters = deque(maxlen=1000)  # (datetime, kind, guild_id, target_id, error)
+        self.checkpoints = {}  # user_id: {"guild_id", "role_type", "updated", "answers": [(question, answer)]}
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def get_ban(self, guild_id: int, user_id: int):
+        bans = self.banned.get(guild_id)
+        ban = bans.bans.get(user_id) if bans else None
+        return ban if ban and ban.active(epoch_now()) else None
+
+    def add_ban(self, guild_id: int, user_id: int, info: BanRecord):
+        if guild_id not in self.banned:
+            self.banned[guild_id] = BanList()
+        self.banned[guild_id].add(user_id, info)
+        if info.expires:
+            heapq.heappush(self.ban_expiry, (info.expires, guild_id, user_id))
+
+    def remove_ban(self, guild_id: int, user_id: int) -> bool:
+        if self.get_ban(guild_id, user_id) is None:
+            return False
+        self.banned[guild_id].remove(user_id)
+        return True
+
+    def count_bans(self, guild_id: int, name: str = None) -> int:
+        bans = self.banned.get(guild_id)
+        return bans.count(name) if bans else 0
+
+    def ban_page(self, guild_id: int, name: str, offset: int, limit: int) -> list:
+        # Newest first, or by name when searching; [(user_id, BanRecord)]
+        bans = self.banned.get(guild_id)
+        return bans.page(name, offset, limit) if bans else []
+
+    def purge_bans(self, now: int) -> int:
+        purged = 0
+        while self.ban_expiry and self.ban_expiry[0][0] <= now:
+            expires, guild_id, user_id = heapq.heappop(self.ban_expiry)
+            bans = self.banned.get(guild_id)
+            # Skip entries for bans that were lifted or replaced since
+            ban = bans.bans.get(user_id) if bans else None
+            if ban and ban.expires == expires:
+                bans.remove(user_id)
+                purged += 1
+        return purged
+
+    # Declines only matter while their cooldown runs, and nothing here survives a restart, so
+    # the CooldownIndex the decision code keeps is the only copy. get_decline_expiry is only
+    # consulted by shard workers for other processes' declines, which needs the SQLite store.
+    def set_declined(self, guild_id: int, user_id: int, date: datetime, expires: datetime):
+        pass
+
+    def get_decline_expiry(self, guild_id: int, user_id: int):
+        return None
+
+    def live_declines(self, now: datetime) -> list:
+        return []
+
+    def purge_declines(self, now: datetime) -> int:
+        return 0
+
+    def count_history(self, user_id: int, guild_id: int = None) -> int:
+        if guild_id is None:
+            return len(self.user_history.get(user_id, ()))
+        return len(self.history_rows.get((guild_id, user_id), ()))
+
+    def history_page(self, user_id: int, guild_id: int = None, offset: int = 0, limit: int = 10) -> list:
+        # (guild_id, entry) pairs, newest first, sliced straight off the end of the time-ordered row lists
+        if guild_id is None:
+            rows = self.user_history.get(user_id, ())
+        else:
+            rows = self.history_rows.get((guild_id, user_id), ())
+        end = len(rows) - offset
+        return [(self.history.guild_id[row], self.history.entry(row)) for row in reversed(rows[max(0, end - limit):max(0, end)])]
+
+    def iter_history(self, guild_id: int = None):
+        # (guild_id, user_id, entry) for every decision, oldest first
+        columns = self.history
+        for row in range(len(columns)):
+            if guild_id is None or columns.guild_id[row] == guild_id:
+                yield columns.guild_id[row], columns.user_id[row], columns.entry(row)
+
+    def add_history(self, guild_id: int, user_id: int, entry: HistoryEntry):
+        row = self.history.append(guild_id, user_id, entry)
+        self.history_rows.setdefault((guild_id, user_id), array.array("L")).append(row)
+        self.user_history.setdefault(user_id, array.array("L")).append(row)
+
+    def get_pending(self, guild_id: int, user_id: int, submission_id: int):
+        entry = self.pending.get(guild_id, {}).get(submission_id)
+        return entry[1] if entry and entry[0] == user_id else None
+
+    def set_pending(self, user_id: int, info: PendingApplication):
+        # Submission ids grow with time, so insertion order is submission order
+        self.pending.setdefault(info.guild_id, {})[info.submission_id] = (user_id, info)
+
+    def pop_pending(self, guild_id: int, user_id: int, submission_id: int):
+        info = self.get_pending(guild_id, user_id, submission_id)
+        if info is not None:
+            del self.pending[guild_id][submission_id]
+        return info
+
+    def pending_for_guild(self, guild_id: int, limit: int = None) -> list:
+        # [(user_id, PendingApplication)], oldest first
+        return list(itertools.islice(self.pending.get(guild_id, {}).values(), limit))
+
+    def iter_pending(self):
+        for applications in self.pending.values():
+            yield from applications.values()
+
+    def pending_summary(self, guild_id: int) -> dict:
+        # role_type: (count, oldest submission_id)
+        summary = {}
+        for _, info in self.pending.get(guild_id, {}).values():
+            count, oldest = summary.get(info.role_type, (0, info.submission_id))
+            summary[info.role_type] = (count + 1, oldest)
+        return summary
+
+    def count_pending(self, guild_id: int, submitted_before: int) -> int:
+        # Applications whose submission_id is at most submitted_before
+        count = 0
+        for submission_id in self.pending.get(guild_id, {}):
+            if submission_id > submitted_before:
+                break
+            count += 1
+        return count
+
+    def batch(self):
+        return contextlib.nullcontext()
+
+    def pending_counts(self) -> dict:
+        return {guild_id: len(applications) for guild_id, applications in self.pending.items() if applications}
+
+    def get_setting(self, guild_id: int, key: str):
+        return self.settings.get(guild_id, {}).get(key)
+
+    def get_settings(self, guild_id: int) -> dict:
+        return dict(self.settings.get(guild_id, {}))
+
+    def add_dead_letter(self, kind: str, guild_id: int, target_id: int, error: str):
+        self.dead_letters.append((datetime.utcnow(), kind, guild_id, target_id, error))
+
+    def purge_dead_letters(self, before: datetime) -> int:
+        purged = 0
+        while self.dead_letters and self.dead_letters[0][0] < before:
+            self.dead_letters.popleft()
+            purged += 1
+        return purged
+
+    def start_checkpoint(self, user_id: int, guild_id: int, role_type: str):
+        self.checkpoints[user_id] = {"guild_id": guild_id, "role_type": role_type, "updated": datetime.utcnow(), "answers": []}
+
+    def add_checkpoint_answer(self, user_id: int, position: int, question: str, answer: str):
+        checkpoint = self.checkpoints.get(user_id)
+        if checkpoint:
+            del checkpoint["answers"][position:]
+            checkpoint["answers"].append((question, answer))
+            checkpoint["updated"] = datetime.utcnow()
+
+    def get_checkpoint(self, user_id: int):
+        checkpoint = self.checkpoints.get(user_id)
+        return dict(checkpoint, answers=list(checkpoint["answers"])) if checkpoint else None
+
+    def checkpoint_summary(self, user_id: int):
+        # (guild_id, role_type, answers saved) without copying the answers, or None
+        checkpoint = self.checkpoints.get(user_id)
+        return (checkpoint["guild_id"], checkpoint["role_type"], len(checkpoint["answers"])) if checkpoint else None
+
+    def delete_checkpoint(self, user_id: int):
+        self.checkpoints.pop(user_id, None)
+
+    def expire_checkpoints(self, before: datetime) -> int:
+        expired = [user_id for user_id, checkpoint in self.checkpoints.items() if checkpoint["updated"] < before]
+        for user_id in expired:
+            del self.checkpoints[user_id]
+        return len(expired)
+
+    def set_setting(self, guild_id: int, key: str, value):
+        if value is None:
+            self.settings.get(guild_id, {}).pop(key, None)
+        else:
+            self.settings.setdefault(guild_id, {})[key] = str(value)
+
+_MISSING = object()
+
+class SQLiteStore:
+    # SQLite in WAL mode. Reads go through a bounded LRU cache, writes are applied to the
+    # cache immediately and committed to disk in batches by a background task.
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bans (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        reason TEXT,
+        date REAL NOT NULL,
+        username TEXT COLLATE NOCASE,  -- name when banned, for searching
+        expires REAL,  -- NULL for permanent bans
+        PRIMARY KEY (guild_id, user_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS bans_guild_date ON bans (guild_id, date);
+    CREATE INDEX IF NOT EXISTS bans_guild_username ON bans (guild_id, username);
+    CREATE INDEX IF NOT EXISTS bans_expires ON bans (expires) WHERE expires IS NOT NULL;
+    CREATE TABLE IF NOT EXISTS declined (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        date REAL NOT NULL,
+        expires REAL NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS declined_expires ON declined (expires);
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        role TEXT NOT NULL,
+        date REAL NOT NULL,
+        moderator TEXT,  -- name, only on rows written before moderator_id existed
+        reason TEXT,
+        moderator_id INTEGER,
+        submitted REAL
+    );
+    CREATE INDEX IF NOT EXISTS history_guild_user ON history (guild_id, user_id, date);
+    CREATE INDEX IF NOT EXISTS history_user ON history (user_id, date);
+    CREATE TABLE IF NOT EXISTS pending (
+        guild_id INTEGER NOT NULL,
+        submission_id INTEGER NOT NULL,  -- snowflake, so a guild's queue is stored oldest first
+        user_id INTEGER NOT NULL,
+        role_type TEXT NOT NULL,
+        PRIMARY KEY (guild_id, submission_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS guild_settings (
+        guild_id INTEGER NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (guild_id, key)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS dead_letters (
+        id INTEGER PRIMARY KEY,
+        date REAL NOT NULL,
+        kind TEXT NOT NULL,
+        guild_id INTEGER NOT NULL,
+        target_id INTEGER NOT NULL,
+        error TEXT
+    );
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        user_id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        role_type TEXT NOT NULL,
+        updated REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS checkpoints_updated ON checkpoints (updated);
+    CREATE TABLE IF NOT EXISTS checkpoint_answers (
+        user_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        PRIMARY KEY (user_id, position)
+    ) WITHOUT ROWID;
+    """
+    # Applied in order to databases created by older versions; PRAGMA user_version tracks progress
+    MIGRATIONS = [
+        "ALTER TABLE pending RENAME COLUMN message_id TO submission_id;",
+        """
+        ALTER TABLE declined ADD COLUMN expires REAL NOT NULL DEFAULT 0;
+        UPDATE declined SET expires = date + CASE WHEN guild_id = 0 THEN 172800 ELSE 86400 END;
+        """,
+        "ALTER TABLE history ADD COLUMN moderator_id INTEGER;",
+        "ALTER TABLE history ADD COLUMN submitted REAL;",
+        """
+        ALTER TABLE bans ADD COLUMN username TEXT COLLATE NOCASE;
+        ALTER TABLE bans ADD COLUMN expires REAL;
+        """,
+        """
+        ALTER TABLE pending RENAME TO pending_by_user;
+        CREATE TABLE pending (
+            guild_id INTEGER NOT NULL,
+            submission_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            role_type TEXT NOT NULL,
+            PRIMARY KEY (guild_id, submission_id)
+        ) WITHOUT ROWID;
+        INSERT INTO pending (guild_id, submission_id, user_id, role_type)
+            SELECT guild_id, submission_id, user_id, role_type FROM pending_by_user;
+        DROP TABLE pending_by_user;
+        """,
+    ]
+
+    # With shared=True other processes use the same file: writes are handed to the writer task right
+    # away and reads of state that isn't tied to one guild (global bans) skip the cache. Everything per
+    # guild stays cached, since a guild's events only ever reach one process. Lock waits are kept to
+    # SHARED_BUSY_TIMEOUT so another worker's transaction can't stall this loop's heartbeats; the
+    # writer task retries whatever couldn't be committed.
+    def __init__(self, path: str, cache_size: int = 10000, flush_interval: float = 0.5, batch_size: int = 500, shared: bool = False):
+        self.db = sqlite3.connect(path, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        if shared:
+            self.db.execute(f"PRAGMA busy_timeout = {int(SHARED_BUSY_TIMEOUT * 1000)}")
+        self.shared = shared
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._cache = OrderedDict()
+        self._writes = []
+        self._batching = 0
+        self._wakeup = None
+        self._writer = None
+
+    def _migrate(self):
+        existing = self.db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pending'").fetchone()
+        if existing:
+            version = self.db.execute("PRAGMA user_version").fetchone()[0]
+            for migration in self.MIGRATIONS[version:]:
+                self.db.executescript(migration)
+        self.db.executescript(self.SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {len(self.MIGRATIONS)}")
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        if self._writer:
+            self._writer.cancel()
+            self._writer = None
+        # Nothing else runs on the loop now, so the last flush may wait out the lock
+        self.db.execute("PRAGMA busy_timeout = 30000")
+        self._flush()
+        self.db.close()
+
+    async def _write_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                self._flush()
+            except sqlite3.OperationalError as e:
+                # Another worker holds the lock; the writes stay buffered for the next pass
+                if not (self.shared and "locked" in str(e)):
+                    print(f"Failed to flush application data: {e}")
+            except sqlite3.Error as e:
+                print(f"Failed to flush application data: {e}")
+
+    def _flush(self):
+        if not self._writes:
+            return
+        batch, self._writes = self._writes, []
+        try:
+            # Take the write lock up front so concurrent writers wait on the busy timeout instead of failing
+            self.db.execute("BEGIN IMMEDIATE")
+            for sql, params in batch:
+                self.db.execute(sql, params)
+            self.db.execute("COMMIT")
+        except sqlite3.Error:
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            self._writes = batch + self._writes
+            raise
+
+    def _catch_up(self):
+        # Reads should see this process's buffered writes. In shared mode another worker may hold the
+        # lock; read what is committed and leave the writes to the writer task rather than wait. Inside
+        # batch() the writes wait for the block to end, so the batch commits as one transaction;
+        # entries it wrote are already in the cache.
+        if self._batching:
+            return
+        try:
+            self._flush()
+        except sqlite3.OperationalError:
+            if not self.shared:
+                raise
+
+    def _write(self, sql: str, params: tuple):
+        self._writes.append((sql, params))
+        if self._batching or not self._wakeup:
+            return
+        if self.shared or len(self._writes) >= self.batch_size:
+            self._wakeup.set()
+
+    @contextlib.contextmanager
+    def batch(self):
+        # Writes made inside the block are committed together, in one transaction, when it exits
+        self._batching += 1
+        try:
+            yield
+        finally:
+            self._batching -= 1
+            if not self._batching:
+                if self.shared and self._wakeup:
+                    # The writer task commits everything buffered in one transaction
+                    self._wakeup.set()
+                else:
+                    self._flush()
+
+    def _remember(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _cached(self, key, load, shared: bool = False, catch_up: bool = True):
+        # Another process may have changed shared state, unless our own write to it is still buffered
+        if shared and self.shared and (not self._writes or key not in self._cache):
+            return load()
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._cache.move_to_end(key)
+            return value
+        # Make sure a miss can see writes that haven't been committed yet, unless the caller's own
+        # writes keep its cache entries current
+        if catch_up:
+            self._catch_up()
+        value = load()
+        self._remember(key, value)
+        return value
+
+    def _query(self, sql: str, params: tuple):
+        self._catch_up()
+        return self.db.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _ban_record(reason, date, username, expires) -> BanRecord:
+        return BanRecord(reason, int(date), username, int(expires or 0))
+
+    def get_ban(self, guild_id: int, user_id: int):
+        def load():
+            row = self.db.execute(
+                "SELECT reason, date, username, expires FROM bans WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+            ).fetchone()
+            return self._ban_record(*row) if row else None
+        ban = self._cached(("ban", guild_id, user_id), load, shared=guild_id == GLOBAL_SCOPE)
+        return ban if ban and ban.active(epoch_now()) else None
+
+    def add_ban(self, guild_id: int, user_id: int, info: BanRecord):
+        self._remember(("ban", guild_id, user_id), info)
+        self._write(
+            "INSERT OR REPLACE INTO bans (guild_id, user_id, reason, date, username, expires) VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, user_id, info.reason, info.date, info.username, info.expires or None)
+        )
+
+    def remove_ban(self, guild_id: int, user_id: int) -> bool:
+        if self.get_ban(guild_id, user_id) is None:
+            return False
+        self._remember(("ban", guild_id, user_id), None)
+        self._write("DELETE FROM bans WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+        return True
+
+    def count_bans(self, guild_id: int, name: str = None) -> int:
+        if name is None:
+            rows = self._query("SELECT COUNT(*) FROM bans WHERE guild_id = ?", (guild_id,))
+        else:
+            rows = self._query(
+                "SELECT COUNT(*) FROM bans WHERE guild_id = ? AND username >= ? AND username < ?",
+                (guild_id, name, name + "\U0010ffff")
+            )
+        return rows[0][0]
+
+    def ban_page(self, guild_id: int, name: str, offset: int, limit: int) -> list:
+        # Both orders are served straight from an index, so no page needs the whole ban list
+        if name is None:
+            rows = self._query(
+                "SELECT user_id, reason, date, username, expires FROM bans WHERE guild_id = ? "
+                "ORDER BY date DESC, user_id DESC LIMIT ? OFFSET ?",
+                (guild_id, limit, offset)
+            )
+        else:
+            rows = self._query(
+                "SELECT user_id, reason, date, username, expires FROM bans WHERE guild_id = ? AND username >= ? AND username < ? "
+                "ORDER BY username, user_id LIMIT ? OFFSET ?",
+                (guild_id, name, name + "\U0010ffff", limit, offset)
+            )
+        return [(row[0], self._ban_record(*row[1:])) for row in rows]
+
+    def purge_bans(self, now: int) -> int:
+        # Cached copies of purged bans are already ignored by get_ban once they expire
+        self._flush()
+        return self.db.execute("DELETE FROM bans WHERE expires <= ?", (now,)).rowcount
+
+    def set_declined(self, guild_id: int, user_id: int, date: datetime, expires: datetime):
+        self._write(
+            "INSERT OR REPLACE INTO declined (guild_id, user_id, date, expires) VALUES (?, ?, ?, ?)",
+            (guild_id, user_id, to_epoch(date), to_epoch(expires))
+        )
+
+    def get_decline_expiry(self, guild_id: int, user_id: int):
+        rows = self._query("SELECT expires FROM declined WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+        return rows[0][0] if rows else None
+
+    def live_declines(self, now: datetime) -> list:
+        rows = self._query("SELECT guild_id, user_id, expires FROM declined WHERE expires > ?", (to_epoch(now),))
+        return [(guild_id, user_id, from_epoch(expires)) for guild_id, user_id, expires in rows]
+
+    def purge_declines(self, now: datetime) -> int:
+        self._flush()
+        return self.db.execute("DELETE FROM declined WHERE expires <= ?", (to_epoch(now),)).rowcount
+
+    def count_history(self, user_id: int, guild_id: int = None) -> int:
+        if guild_id is None:
+            rows = self._query("SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,))
+        else:
+            rows = self._query("SELECT COUNT(*) FROM history WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+        return rows[0][0]
+
+    def history_page(self, user_id: int, guild_id: int = None, offset: int = 0, limit: int = 10) -> list:
+        # (guild_id, entry) pairs, newest first; both queries are served by an index ending in date
+        columns = "SELECT guild_id, action, role, date, moderator_id, reason, submitted, moderator FROM history "
+        if guild_id is None:
+            rows = self._query(
+                columns + "WHERE user_id = ? ORDER BY date DESC, id DESC LIMIT ? OFFSET ?",
+                (user_id, limit, offset)
+            )
+        else:
+            rows = self._query(
+                columns + "WHERE guild_id = ? AND user_id = ? ORDER BY date DESC, id DESC LIMIT ? OFFSET ?",
+                (guild_id, user_id, limit, offset)
+            )
+        return [(row[0], self._history_entry(*row[1:])) for row in rows]
+
+    def iter_history(self, guild_id: int = None):
+        # (guild_id, user_id, entry) for every decision, oldest first, streamed off the cursor
+        self._catch_up()
+        columns = "SELECT guild_id, user_id, action, role, date, moderator_id, reason, submitted, moderator FROM history "
+        if guild_id is None:
+            cursor = self.db.execute(columns + "ORDER BY id", ())
+        else:
+            cursor = self.db.execute(columns + "WHERE guild_id = ? ORDER BY id", (guild_id,))
+        for row in cursor:
+            yield row[0], row[1], self._history_entry(*row[2:])
+
+    @staticmethod
+    def _history_entry(action: str, role: str, date: float, moderator_id: int, reason: str, submitted: float, moderator: str) -> HistoryEntry:
+        return HistoryEntry(Action(action), sys.intern(role), int(date), moderator_id or 0, reason, int(submitted or 0), moderator)
+
+    def add_history(self, guild_id: int, user_id: int, entry: HistoryEntry):
+        self._write(
+            "INSERT INTO history (guild_id, user_id, action, role, date, moderator_id, reason, submitted) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, user_id, entry.action.value, entry.role, entry.date, entry.moderator_id, entry.reason, entry.submitted or None)
+        )
+
+    def get_pending(self, guild_id: int, user_id: int, submission_id: int):
+        def load():
+            row = self.db.execute(
+                "SELECT role_type FROM pending WHERE guild_id = ? AND submission_id = ? AND user_id = ?",
+                (guild_id, submission_id, user_id)
+            ).fetchone()
+            return PendingApplication(submission_id, sys.intern(row[0]), guild_id) if row else None
+        return self._cached(("pending", guild_id, user_id, submission_id), load)
+
+    def set_pending(self, user_id: int, info: PendingApplication):
+        self._remember(("pending", info.guild_id, user_id, info.submission_id), info)
+        self._write(
+            "INSERT OR REPLACE INTO pending (guild_id, submission_id, user_id, role_type) VALUES (?, ?, ?, ?)",
+            (info.guild_id, info.submission_id, user_id, info.role_type)
+        )
+
+    def pop_pending(self, guild_id: int, user_id: int, submission_id: int):
+        info = self.get_pending(guild_id, user_id, submission_id)
+        if info is not None:
+            self._remember(("pending", guild_id, user_id, submission_id), None)
+            self._write("DELETE FROM pending WHERE guild_id = ? AND submission_id = ?", (guild_id, submission_id))
+        return info
+
+    def pending_for_guild(self, guild_id: int, limit: int = None) -> list:
+        # [(user_id, PendingApplication)], oldest first, read in primary key order
+        rows = self._query(
+            "SELECT user_id, submission_id, role_type FROM pending WHERE guild_id = ? ORDER BY submission_id LIMIT ?",
+            (guild_id, -1 if limit is None else limit)
+        )
+        pending = [(user_id, PendingApplication(submission_id, sys.intern(role_type), guild_id)) for user_id, submission_id, role_type in rows]
+        for user_id, info in pending:
+            self._remember(("pending", guild_id, user_id, info.submission_id), info)
+        return pending
+
+    def iter_pending(self):
+        self._catch_up()
+        for user_id, submission_id, role_type, guild_id in self.db.execute("SELECT user_id, submission_id, role_type, guild_id FROM pending"):
+            yield user_id, PendingApplication(submission_id, sys.intern(role_type), guild_id)
+
+    def pending_summary(self, guild_id: int) -> dict:
+        # role_type: (count, oldest submission_id)
+        rows = self._query(
+            "SELECT role_type, COUNT(*), MIN(submission_id) FROM pending WHERE guild_id = ? GROUP BY role_type", (guild_id,)
+        )
+        return {role_type: (count, oldest) for role_type, count, oldest in rows}
+
+    def count_pending(self, guild_id: int, submitted_before: int) -> int:
+        rows = self._query("SELECT COUNT(*) FROM pending WHERE guild_id = ? AND submission_id <= ?", (guild_id, submitted_before))
+        return rows[0][0]
+
+    def pending_counts(self) -> dict:
+        return dict(self._query("SELECT guild_id, COUNT(*) FROM pending GROUP BY guild_id", ()))
+
+    def get_setting(self, guild_id: int, key: str):
+        def load():
+            row = self.db.execute(
+                "SELECT value FROM guild_settings WHERE guild_id = ? AND key = ?", (guild_id, key)
+            ).fetchone()
+            return row[0] if row else None
+        return self._cached(("setting", guild_id, key), load)
+
+    def get_settings(self, guild_id: int) -> dict:
+        return dict(self._query("SELECT key, value FROM guild_settings WHERE guild_id = ?", (guild_id,)))
+
+    def add_dead_letter(self, kind: str, guild_id: int, target_id: int, error: str):
+        self._write(
+            "INSERT INTO dead_letters (date, kind, guild_id, target_id, error) VALUES (?, ?, ?, ?, ?)",
+            (to_epoch(datetime.utcnow()), kind, guild_id, target_id, error)
+        )
+
+    def purge_dead_letters(self, before: datetime) -> int:
+        self._flush()
+        return self.db.execute("DELETE FROM dead_letters WHERE date < ?", (to_epoch(before),)).rowcount
+
+    def start_checkpoint(self, user_id: int, guild_id: int, role_type: str):
+        self._remember(("checkpoint", user_id), (guild_id, role_type, 0, time.time()))
+        self._write("DELETE FROM checkpoint_answers WHERE user_id = ?", (user_id,))
+        self._write(
+            "INSERT OR REPLACE INTO checkpoints (user_id, guild_id, role_type, updated) VALUES (?, ?, ?, ?)",
+            (user_id, guild_id, role_type, to_epoch(datetime.utcnow()))
+        )
+
+    def add_checkpoint_answer(self, user_id: int, position: int, question: str, answer: str):
+        # One row per answer, so a checkpoint never rewrites the whole session
+        summary = self._cache.get(("checkpoint", user_id))
+        if summary:
+            self._remember(("checkpoint", user_id), (summary[0], summary[1], position + 1, time.time()))
+        self._write(
+            "INSERT OR REPLACE INTO checkpoint_answers (user_id, position, question, answer) VALUES (?, ?, ?, ?)",
+            (user_id, position, question, answer)
+        )
+        self._write("UPDATE checkpoints SET updated = ? WHERE user_id = ?", (to_epoch(datetime.utcnow()), user_id))
+
+    def get_checkpoint(self, user_id: int):
+        rows = self._query("SELECT guild_id, role_type, updated FROM checkpoints WHERE user_id = ?", (user_id,))
+        if not rows:
+            return None
+        guild_id, role_type, updated = rows[0]
+        answers = self.db.execute(
+            "SELECT question, answer FROM checkpoint_answers WHERE user_id = ? ORDER BY position", (user_id,)
+        ).fetchall()
+        return {"guild_id": guild_id, "role_type": role_type, "updated": from_epoch(updated), "answers": answers}
+
+    def checkpoint_summary(self, user_id: int):
+        # (guild_id, role_type, answers saved) or None. Checked on every role menu click, so it is
+        # cached and kept current by the checkpoint writes instead of flushing to read it
+        def load():
+            row = self.db.execute(
+                "SELECT guild_id, role_type, (SELECT COUNT(*) FROM checkpoint_answers WHERE user_id = ?), updated "
+                "FROM checkpoints WHERE user_id = ?", (user_id, user_id)
+            ).fetchone()
+            return tuple(row) if row else None
+        summary = self._cached(("checkpoint", user_id), load, catch_up=False)
+        # The sweeper deletes expired checkpoints without touching the cache
+        if summary is None or summary[3] < time.time() - CHECKPOINT_TTL.total_seconds():
+            return None
+        return summary[:3]
+
+    def delete_checkpoint(self, user_id: int):
+        self._remember(("checkpoint", user_id), None)
+        self._write("DELETE FROM checkpoint_answers WHERE user_id = ?", (user_id,))
+        self._write("DELETE FROM checkpoints WHERE user_id = ?", (user_id,))
+
+    def expire_checkpoints(self, before: datetime) -> int:
+        self._flush()
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(
+                "DELETE FROM checkpoint_answers WHERE user_id IN (SELECT user_id FROM checkpoints WHERE updated < ?)",
+                (to_epoch(before),)
+            )
+            expired = self.db.execute("DELETE FROM checkpoints WHERE updated < ?", (to_epoch(before),)).rowcount
+            self.db.execute("COMMIT")
+        except sqlite3.Error:
+            # Leaving the transaction open would make every later flush fail at BEGIN
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            raise
+        return expired
+
+    def set_setting(self, guild_id: int, key: str, value):
+        if value is None:
+            self._remember(("setting", guild_id, key), None)
+            self._write("DELETE FROM guild_settings WHERE guild_id = ? AND key = ?", (guild_id, key))
+        else:
+            self._remember(("setting", guild_id, key), str(value))
+            self._write(
+                "INSERT OR REPLACE INTO guild_settings (guild_id, key, value) VALUES (?, ?, ?)",
+                (guild_id, key, str(value))
+            )
+
+store = SQLiteStore(DATABASE_PATH, shared=SHARED_STATE) if STORAGE_BACKEND == "sqlite" else MemoryStore()
+
+class Histogram:
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(self.BUCKETS)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    # Counters, callback gauges and latency histograms, keyed by (name, sorted label pairs).
+    # Rendered for Prometheus on /metrics and pushed to any registered sinks.
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}  # name: callback returning a number or a list of (labels dict, number)
+        self.sinks = []
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def gauge(self, name: str, callback):
+        self.gauges[name] = callback
+
+    def add_sink(self, sink):
+        # A sink is any object with an emit(snapshot) method
+        self.sinks.append(sink)
+
+    def snapshot(self) -> dict:
+        gauges = {}
+        for name, callback in self.gauges.items():
+            value = callback()
+            if isinstance(value, list):
+                for labels, number in value:
+                    gauges[(name, tuple(sorted(labels.items())))] = number
+            else:
+                gauges[(name, ())] = value
+        return {"counters": dict(self.counters), "gauges": gauges, "histograms": dict(self.histograms)}
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+            snapshot = self.snapshot()
+            for sink in self.sinks:
+                try:
+                    sink.emit(snapshot)
+                except Exception as e:
+                    print(f"Metrics sink {type(sink).__name__} failed: {e}")
+
+    @staticmethod
+    def _labels(labels: tuple, extra: str = "") -> str:
+        parts = []
+        for key, value in labels:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            parts.append(f'{key}="{value}"')
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+        for (name, labels), value in sorted(snapshot["gauges"].items(), key=lambda item: item[0]):
+            declare(name, "gauge")
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), value in sorted(snapshot["counters"].items(), key=lambda item: item[0]):
+            declare(name, "counter")
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), histogram in sorted(snapshot["histograms"].items(), key=lambda item: item[0]):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(Histogram.BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+class LogSink:
+    # Prints the slowest handlers by average latency; useful without a Prometheus scraper
+    def __init__(self, top: int = 5):
+        self.top = top
+
+    def emit(self, snapshot: dict):
+        slowest = sorted(
+            ((histogram.sum / histogram.count, histogram.count, name, dict(labels))
+             for (name, labels), histogram in snapshot["histograms"].items() if histogram.count),
+            key=lambda item: item[0],
+            reverse=True
+        )[:self.top]
+        for mean, count, name, labels in slowest:
+            print(f"[metrics] {name} {labels}: avg {mean * 1000:.1f}ms over {count} calls")
+
+metrics = Metrics()
+if METRICS_SINK == "log":
+    metrics.add_sink(LogSink())
+
+def instrumented(kind: str):
+    # Records latency and errors by type for a command or view/modal callback
+    def decorator(func):
+        name = func.__qualname__
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                metrics.inc("handler_errors_total", kind=kind, handler=name, error=type(e).__name__)
+                raise
+            finally:
+                metrics.observe("handler_latency_seconds", time.perf_counter() - start, kind=kind, handler=name)
+        return wrapper
+    return decorator
+
+def instrument_http(http):
+    # Times every REST call discord.py makes, labelled by method and route template
+    request = http.request
+    async def timed_request(route, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await request(route, **kwargs)
+        except discord.HTTPException as e:
+            metrics.inc("discord_rest_errors_total", method=route.method, route=route.path, status=e.status)
+            raise
+        finally:
+            metrics.observe("discord_rest_latency_seconds", time.perf_counter() - start, method=route.method, route=route.path)
+    http.request = timed_request
+
+class RateLimitCounter(logging.Filter):
+    # discord.py retries 429s internally and only logs them, so count them from the log records
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = str(record.msg)
+        if message.startswith("We are being rate limited"):
+            metrics.inc("discord_rate_limit_hits_total", scope="route")
+        elif message.startswith("Global rate limit"):
+            metrics.inc("discord_rate_limit_hits_total", scope="global")
+        return True
+
+logging.getLogger("discord.http").addFilter(RateLimitCounter())
+
+def task_counts(limit: int = 10) -> list:
+    # [(coroutine name, running tasks)], most common first
+    counts = {}
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        name = getattr(coro, "__qualname__", None) or type(coro).__name__
+        counts[name] = counts.get(name, 0) + 1
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+class SlowCallbackReporter(logging.Filter):
+    # In debug mode asyncio logs "Executing <handle> took N seconds" for every callback that held the
+    # loop past slow_callback_duration; follow each one with what else was running at the time
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if str(record.msg).startswith("Executing"):
+            self.count += 1
+            metrics.inc("event_loop_slow_callbacks_total")
+            tasks = ", ".join(f"{name} x{count}" for name, count in task_counts())
+            print(f"⚠️ Slow callback #{self.count}, running tasks: {tasks}")
+        return True
+
+class Profiler:
+    # On-demand diagnosis for a bounded window, installed only while it runs. "collapsed" samples the
+    # event loop thread's stack from a side thread (flamegraph-ready "frame;frame;frame count" lines);
+    # "pstats" runs cProfile on the loop thread. Either way asyncio's debug mode reports slow callbacks.
+    def __init__(self):
+        self.running = False
+
+    async def run(self, seconds: float, fmt: str = "collapsed", slow_ms: int = 100) -> dict:
+        if self.running:
+            raise RuntimeError("a profile is already running")
+        self.running = True
+        loop = asyncio.get_running_loop()
+        debug, slow_duration = loop.get_debug(), loop.slow_callback_duration
+        reporter = SlowCallbackReporter()
+        asyncio_logger = logging.getLogger("asyncio")
+        asyncio_logger.addFilter(reporter)
+        loop.slow_callback_duration = slow_ms / 1000
+        loop.set_debug(True)
+        try:
+            if fmt == "pstats":
+                result = await self._profile(seconds)
+            else:
+                result = await self._sample(seconds)
+        finally:
+            loop.set_debug(debug)
+            loop.slow_callback_duration = slow_duration
+            asyncio_logger.removeFilter(reporter)
+            self.running = False
+        result["slow_callbacks"] = reporter.count
+        result["tasks"] = task_counts()
+        return result
+
+    def _path(self, extension: str) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        return os.path.join(PROFILE_DIR, f"profile-{datetime.utcnow():%Y%m%d-%H%M%S}.{extension}")
+
+    async def _sample(self, seconds: float) -> dict:
+        stacks = {}  # "outer;...;inner": samples
+        stop = threading.Event()
+        thread_id = threading.get_ident()
+
+        def sample():
+            while not stop.wait(PROFILE_SAMPLE_INTERVAL):
+                frame = sys._current_frames().get(thread_id)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_qualname}")
+                    frame = frame.f_back
+                key = ";".join(reversed(names))
+                stacks[key] = stacks.get(key, 0) + 1
+
+        sampler = threading.Thread(target=sample, name="profiler", daemon=True)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+
+        path = self._path("collapsed")
+        lines = [f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: item[1], reverse=True)]
+        await asyncio.to_thread(self._write, path, lines)
+        samples = sum(stacks.values())
+        leaves = {}
+        for stack, count in stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        top = sorted(leaves.items(), key=lambda item: item[1], reverse=True)[:5]
+        return {
+            "path": path,
+            "samples": samples,
+            "top": [f"{leaf}: {count / samples:.0%}" for leaf, count in top] if samples else [],
+        }
+
+    @staticmethod
+    def _write(path: str, lines: list):
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.writelines(lines)
+
+    async def _profile(self, seconds: float) -> dict:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+        path = self._path("pstats")
+        await asyncio.to_thread(profile.dump_stats, path)
+        stats = pstats.Stats(profile).stats  # (file, line, function): (calls, primitive calls, own time, total time, callers)
+        top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:5]
+        return {
+            "path": path,
+            "calls": sum(entry[0] for entry in stats.values()),
+            "top": [f"{os.path.basename(file)}:{line} {function}: {entry[2] * 1000:.0f}ms" for (file, line, function), entry in top],
+        }
+
+profiler = Profiler()
+
+class HealthServer:
+    # Keep-alive, health and metrics endpoints served from the bot's own event loop
+    def __init__(self):
+        self.app = web.Application()
+        self.app.router.add_get("/", self.home)
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/readyz", self.readyz)
+        self.app.router.add_get("/metrics", self.metrics)
+        self.app.router.add_post("/debug/profile", self.debug_profile)
+        self.runner = None
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        for port in (HEALTH_PORT, HEALTH_PORT + 1):
+            try:
+                await web.TCPSite(self.runner, "0.0.0.0", port).start()
+                print(f"Health server listening on port {port}")
+                return
+            except OSError:
+                # If the port is busy, try the next one
+                continue
+        print(f"⚠️ Couldn't start the health server on port {HEALTH_PORT} or {HEALTH_PORT + 1}")
+
+    async def close(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    @staticmethod
+    def heartbeat_age(ws):
+        keep_alive = getattr(ws, "_keep_alive", None) if ws else None
+        last_ack = getattr(keep_alive, "_last_ack", None)
+        return time.perf_counter() - last_ack if last_ack else None
+
+    def gateway(self) -> dict:
+        # A sharded bot is only as healthy as its worst shard
+        if isinstance(bot, commands.AutoShardedBot):
+            sockets = {shard_id: shard._parent.ws for shard_id, shard in bot.shards.items()}
+        else:
+            sockets = {bot.shard_id or 0: bot.ws}
+        ages = [self.heartbeat_age(ws) for ws in sockets.values()]
+        latency = bot.latency
+        connected = bool(sockets) and all(ws is not None for ws in sockets.values()) and not bot.is_closed()
+        return {
+            "connected": connected,
+            "ready": bot.is_ready(),
+            "latency": latency if math.isfinite(latency) else None,
+            "last_heartbeat_ack": max(ages) if ages and None not in ages else None,
+            "shard_ids": sorted(sockets),
+            "shard_count": bot.shard_count or 1,
+            "guilds": len(bot.guilds),
+        }
+
+    async def home(self, request: web.Request):
+        return web.Response(text="Bot is running!")
+
+    async def healthz(self, request: web.Request):
+        gateway = self.gateway()
+        healthy = (
+            gateway["connected"]
+            and gateway["latency"] is not None
+            and gateway["last_heartbeat_ack"] is not None
+            and gateway["last_heartbeat_ack"] < HEARTBEAT_STALE_AFTER
+        )
+        return web.json_response(dict(gateway, status="ok" if healthy else "unhealthy"), status=200 if healthy else 503)
+
+    async def readyz(self, request: web.Request):
+        ready = bot.is_ready() and not bot.is_closed()
+        return web.json_response({"ready": ready}, status=200 if ready else 503)
+
+    async def metrics(self, request: web.Request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def debug_profile(self, request: web.Request):
+        # POST /debug/profile?seconds=30&format=collapsed&slow_ms=100 with "Authorization: Bearer <ADMIN_TOKEN>";
+        # answers once the window is over
+        if not ADMIN_TOKEN:
+            raise web.HTTPNotFound()
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {ADMIN_TOKEN}"):
+            raise web.HTTPUnauthorized()
+        try:
+            seconds = min(PROFILE_MAX_SECONDS, max(1.0, float(request.query.get("seconds", 30))))
+            slow_ms = max(1, int(request.query.get("slow_ms", 100)))
+        except ValueError:
+            raise web.HTTPBadRequest(text="seconds and slow_ms must be numbers")
+        fmt = request.query.get("format", "collapsed")
+        if fmt not in ("collapsed", "pstats"):
+            raise web.HTTPBadRequest(text="format must be collapsed or pstats")
+        try:
+            result = await profiler.run(seconds, fmt, slow_ms)
+        except RuntimeError as e:
+            return web.json_response({"error": str(e)}, status=409)
+        return web.json_response(result)
+
+health = HealthServer()
+
+metrics.gauge("discord_gateway_connected", lambda: int(health.gateway()["connected"]))
+metrics.gauge("discord_gateway_latency_seconds", lambda: health.gateway()["latency"] or float("nan"))
+metrics.gauge("discord_guilds", lambda: len(bot.guilds))
+metrics.gauge("application_sessions_active", lambda: sessions.active)
+metrics.gauge("application_sessions_queued", lambda: len(sessions.queue))
+metrics.gauge("application_outbound_queue_size", lambda: outbound.queue.qsize())
+metrics.gauge("application_pending", lambda: [({"guild_id": guild_id}, count) for guild_id, count in store.pending_counts().items()])
+metrics.gauge("application_cooldowns", lambda: [({"scope": scope}, count) for scope, count in cooldowns.counts().items()])
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+class ApplicationBot(commands.AutoShardedBot if SHARD_MODE in ("auto", "worker") else commands.Bot):
+    async def setup_hook(self):
+        instrument_http(self.http)
+        await health.start()
+        await store.start()
+        self.add_dynamic_items(ReviewButton)
+        if MEMBER_CACHE == "lazy":
+            reviewers.watch(self._connection)
+        outbound.start()
+        for guild_id, user_id, expires in store.live_declines(datetime.utcnow()):
+            cooldowns.add(guild_id, user_id, to_epoch(expires))
+        stats.rebuild(store.iter_history())
+        pending_reminders.start(store.iter_pending())
+        self.sweeper = asyncio.create_task(sweep_expired())
+        if metrics.sinks:
+            self.metrics_flusher = asyncio.create_task(metrics.flush_loop())
 
-# Start the keep-alive server
-keep_alive()
+    async def close(self):
+        if self.is_closed():
+            return
+        # Queued DMs and log posts need the HTTP session, which super().close() shuts
+        pending_reminders.close()
+        log_batcher.close()
+        await outbound.close()
+        await super().close()
+        await store.close()
+        await health.close()
 
 intents = discord.Intents.default()
 intents.messages = True
@@ -41,24 +1352,16 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot_options = {}
+if MEMBER_CACHE == "lazy":
+    # No startup chunking and no member cache; ReviewerIndex caches the Dev role holders itself
+    bot_options.update(member_cache_flags=discord.MemberCacheFlags.none(), chunk_guilds_at_startup=False)
+if SHARD_MODE in ("auto", "worker"):
+    bot_options.update(shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+bot = ApplicationBot(command_prefix="!", intents=intents, **bot_options)
 tree = bot.tree
 
-# Server-specific storage
-server_data = {
-    # guild_id: {
-    #   'declined': {user_id: datetime},
-    #   'banned': {user_id: {'reason': str, 'date': datetime}},
-    #   'history': {user_id: list of application history}
-    # }
-}
-
-# Global storage for cross-server reference
-global_declined = {}  # user_id : datetime_of_decline
-global_banned = {}     # user_id : {"reason": str, "date": datetime}
-pending_applications = {}  # user_id: {"message_id": int, "role_type": str, "guild_id": int}
-
-# Application questions
+# Default question sets, used by every guild that hasn't set up its own with /application_role_set
 questions = {
     "Staff": [
         "1. Why do you want to be staff?",
@@ -98,70 +1401,176 @@ questions = {
     ]
 }
 
-application_status = {"Staff": True, "Media": True, "Developer": True}
+MAX_ROLE_TYPES = 25  # options in one select menu
+MAX_QUESTIONS = 25   # fields in the submission embed
+SUBMISSION_TEXT_BUDGET = 5600  # questions + answers in one submission embed; title and footer take the rest of Discord's 6000
+MIN_ANSWER_LENGTH = 100  # room every question's answer must keep when questions are edited
+
+def answer_limit(qlist) -> int:
+    # Longest answer each question takes so the whole submission fits in one embed
+    return max(1, min(1024, (SUBMISSION_TEXT_BUDGET - sum(len(q) for q in qlist)) // len(qlist)))
+
+@dataclass(slots=True, frozen=True)
+class RoleConfig:
+    name: str
+    description: str
+    emoji: str
+    questions: tuple
+
+    def to_json(self) -> dict:
+        return {"name": self.name, "description": self.description, "emoji": self.emoji, "questions": list(self.questions)}
+
+DEFAULT_ROLES = {
+    role.name: role for role in (
+        RoleConfig("Staff", "Apply for Staff role", "🛡️", tuple(questions["Staff"])),
+        RoleConfig("Media", "Apply for Media role", "🎥", tuple(questions["Media"])),
+        RoleConfig("Developer", "Apply for Developer role", "💻", tuple(questions["Developer"])),
+    )
+}
+
+class GuildConfig:
+    # One guild's settings, parsed once. Guilds without their own roles share DEFAULT_ROLES.
+    __slots__ = ("roles", "closed", "decline_cooldown", "log_channel_id", "_options")
+
+    def __init__(self, roles: dict, closed: frozenset, decline_cooldown: timedelta, log_channel_id: int = None):
+        self.roles = roles  # name: RoleConfig, in menu order
+        self.closed = closed
+        self.decline_cooldown = decline_cooldown
+        self.log_channel_id = log_channel_id
+        self._options = None
+
+    def role(self, name: str):
+        return self.roles.get(name)
+
+    def is_open(self, name: str) -> bool:
+        return name in self.roles and name not in self.closed
+
+    def select_options(self) -> list:
+        # Built on first use and reused by every menu until the config is invalidated
+        if self._options is None:
+            self._options = [
+                discord.SelectOption(label=role.name, description=role.description or None, emoji=role.emoji or None)
+                for role in self.roles.values() if role.name not in self.closed
+            ]
+        return self._options
+
+class GuildConfigCache:
+    # guild_id -> GuildConfig, loaded from guild_settings on first use and kept in a bounded LRU.
+    # Every admin command that changes a setting calls invalidate().
+    def __init__(self, size: int):
+        self.size = size
+        self.configs = OrderedDict()
+
+    def get(self, guild_id: int) -> GuildConfig:
+        config = self.configs.get(guild_id)
+        if config is not None:
+            self.configs.move_to_end(guild_id)
+            return config
+        config = self.configs[guild_id] = self.load(guild_id)
+        if len(self.configs) > self.size:
+            self.configs.popitem(last=False)
+        return config
+
+    def load(self, guild_id: int) -> GuildConfig:
+        settings = store.get_settings(guild_id)
+        roles = DEFAULT_ROLES
+        closed = frozenset()
+        try:
+            if "roles" in settings:
+                roles = {}
+                for role in json.loads(settings["roles"]):
+                    roles[role["name"]] = RoleConfig(
+                        sys.intern(role["name"]), role.get("description", ""), role.get("emoji", ""), tuple(role["questions"])
+                    )
+            if "closed_roles" in settings:
+                closed = frozenset(json.loads(settings["closed_roles"]))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring invalid application roles for guild {guild_id}: {e}")
+        hours = settings.get("decline_cooldown_hours")
+        log_channel_id = settings.get("log_channel_id")
+        return GuildConfig(
+            roles,
+            closed,
+            timedelta(hours=float(hours)) if hours else DEFAULT_DECLINE_COOLDOWN,
+            int(log_channel_id) if log_channel_id else None
+        )
+
+    def invalidate(self, guild_id: int):
+        self.configs.pop(guild_id, None)
+
+    def save_roles(self, guild_id: int, roles: dict):
+        store.set_setting(guild_id, "roles", json.dumps([role.to_json() for role in roles.values()]))
+        self.invalidate(guild_id)
+
+    def save_closed(self, guild_id: int, closed: set):
+        store.set_setting(guild_id, "closed_roles", json.dumps(sorted(closed)) if closed else None)
+        self.invalidate(guild_id)
+
+guild_configs = GuildConfigCache(GUILD_CONFIG_CACHE_SIZE)
 
 class RoleSelect(ui.Select):
     def __init__(self, guild_id: int):
-        options = []
-        if application_status["Staff"]:
-            options.append(discord.SelectOption(label="Staff", description="Apply for Staff role", emoji="🛡️"))
-        if application_status["Media"]:
-            options.append(discord.SelectOption(label="Media", description="Apply for Media role", emoji="🎥"))
-        if application_status["Developer"]:
-            options.append(discord.SelectOption(label="Developer", description="Apply for Developer role", emoji="💻"))
-
         super().__init__(
             placeholder="Select an application role...",
             min_values=1,
             max_values=1,
-            options=options
+            options=list(guild_configs.get(guild_id).select_options())
         )
         self.guild_id = guild_id
 
+    @instrumented("view")
     async def callback(self, interaction: discord.Interaction):
         role_type = self.values[0]
         guild_id = interaction.guild.id
+        if not await admit(interaction, guild_id):
+            return
+
+        # Point repeat clicks at the questionnaire that is already running
+        session = sessions.sessions.get(interaction.user.id)
+        if session:
+            await interaction.response.send_message(session_in_progress(session), ephemeral=True)
+            return
 
-        # Initialize server data if not exists
-        if guild_id not in server_data:
-            server_data[guild_id] = {'declined': {}, 'banned': {}, 'history': {}}
+        # The menu may be older than the last /application_close or role change
+        config = guild_configs.get(guild_id)
+        if not config.is_open(role_type):
+            await interaction.response.send_message(f"⛔ {role_type} applications are currently closed.", ephemeral=True)
+            return
 
         # Check global ban first
-        if interaction.user.id in global_banned:
-            ban_info = global_banned[interaction.user.id]
+        ban_info = store.get_ban(GLOBAL_SCOPE, interaction.user.id)
+        if ban_info:
             await interaction.response.send_message(
-                f"❌ You are globally banned from applying.\nReason: {ban_info['reason']}\nBanned on: {ban_info['date'].strftime('%Y-%m-%d %H:%M UTC')}",
+                f"❌ You are globally banned from applying.\n{ban_details(ban_info)}",
                 ephemeral=True
             )
             return
 
         # Check server-specific ban
-        if interaction.user.id in server_data[guild_id]['banned']:
-            ban_info = server_data[guild_id]['banned'][interaction.user.id]
+        ban_info = store.get_ban(guild_id, interaction.user.id)
+        if ban_info:
             await interaction.response.send_message(
-                f"❌ You are banned from applying in this server.\nReason: {ban_info['reason']}\nBanned on: {ban_info['date'].strftime('%Y-%m-%d %H:%M UTC')}",
+                f"❌ You are banned from applying in this server.\n{ban_details(ban_info)}",
                 ephemeral=True
             )
             return
 
-        # Check global decline cooldown (48h)
-        last_decline = global_declined.get(interaction.user.id)
-        if last_decline and datetime.utcnow() < last_decline + timedelta(hours=48):
-            remaining = (last_decline + timedelta(hours=48)) - datetime.utcnow()
-            hours = int(remaining.total_seconds() // 3600)
-            minutes = int((remaining.total_seconds() % 3600) // 60)
+        # Check global decline cooldown
+        remaining = cooldown_remaining(GLOBAL_SCOPE, interaction.user.id)
+        if remaining:
+            hours = int(remaining // 3600)
+            minutes = int((remaining % 3600) // 60)
             await interaction.response.send_message(
                 f"❌ You were declined recently. You can reapply in {hours}h {minutes}m.",
                 ephemeral=True
             )
             return
 
-        # Check server-specific decline cooldown (24h)
-        server_decline = server_data[guild_id]['declined'].get(interaction.user.id)
-        if server_decline and datetime.utcnow() < server_decline + timedelta(hours=24):
-            remaining = (server_decline + timedelta(hours=24)) - datetime.utcnow()
-            hours = int(remaining.total_seconds() // 3600)
-            minutes = int((remaining.total_seconds() % 3600) // 60)
+        # Check server-specific decline cooldown
+        remaining = cooldown_remaining(guild_id, interaction.user.id)
+        if remaining:
+            hours = int(remaining // 3600)
+            minutes = int((remaining % 3600) // 60)
             await interaction.response.send_message(
                 f"❌ You were declined in this server recently. You can reapply here in {hours}h {minutes}m.",
                 ephemeral=True
@@ -169,13 +1578,22 @@ class RoleSelect(ui.Select):
             return
 
         await interaction.response.defer(ephemeral=True)
+        embed = discord.Embed(
+            title=f"{role_type} Application",
+            description="Click below to begin your application.",
+            color=discord.Color.blurple()
+        )
+        checkpoint = store.checkpoint_summary(interaction.user.id)
+        resumable = bool(checkpoint and checkpoint[:2] == (guild_id, role_type))
+        if resumable:
+            embed.description = f"You have an unfinished application ({checkpoint[2]} answers saved). Resume it or start over."
+        view = StartApplicationView(role_type, guild_id, config.role(role_type).questions, resumable)
+        if QUESTIONNAIRE_MODE == "modal":
+            # Forms don't need DMs, so start right here
+            await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+            return
         try:
-            embed = discord.Embed(
-                title=f"{role_type} Application",
-                description="Click below to begin your application.",
-                color=discord.Color.blurple()
-            )
-            await interaction.user.send(embed=embed, view=StartApplicationView(role_type, guild_id))
+            await interaction.user.send(embed=embed, view=view)
             await interaction.followup.send("📩 Check your DMs to continue your application.", ephemeral=True)
         except discord.Forbidden:
             await interaction.followup.send("❌ I couldn't DM you. Please check your privacy settings.", ephemeral=True)
@@ -185,278 +1603,1101 @@ class ApplicationView(ui.View):
         super().__init__(timeout=None)
         self.add_item(RoleSelect(guild_id))
 
+DM_PRIORITY = 0   # applicant DMs go out before log posts
+LOG_PRIORITY = 1
+
+class OutboundJob:
+    def __init__(self, kind: str, guild_id: int, target_id: int, send, on_done=None):
+        self.kind = kind  # "dm" or "log"
+        self.guild_id = guild_id
+        self.target_id = target_id
+        self.send = send  # coroutine function doing the actual API call
+        self.on_done = on_done  # called with None once sent, or with the error once given up on
+        self.attempts = 0
+
+class OutboundQueue:
+    # Side effects of review decisions, sent after the reviewer has been answered. Rate limits
+    # and server errors are retried with backoff; anything else ends up as a dead letter.
+    def __init__(self, workers: int = OUTBOUND_WORKERS, max_attempts: int = OUTBOUND_MAX_ATTEMPTS, base_delay: float = 1.0):
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.queue = asyncio.PriorityQueue()
+        self.order = itertools.count()
+        self.workers = []
+
+    def start(self):
+        self.workers = [asyncio.create_task(self._work()) for _ in range(self.worker_count)]
+
+    async def close(self, timeout: float = 10):
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Shutting down with {self.queue.qsize()} outbound messages unsent")
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+
+    def put(self, priority: int, job: OutboundJob):
+        self.queue.put_nowait((priority, next(self.order), job))
+
+    async def _work(self):
+        while True:
+            priority, _, job = await self.queue.get()
+            try:
+                job.attempts += 1
+                await job.send()
+                if job.on_done:
+                    job.on_done(None)
+            except discord.HTTPException as e:
+                if (e.status == 429 or e.status >= 500) and job.attempts < self.max_attempts:
+                    delay = self.base_delay * 2 ** (job.attempts - 1) + random.uniform(0, self.base_delay)
+                    asyncio.get_running_loop().call_later(delay, self.put, priority, job)
+                else:
+                    self.dead_letter(job, e)
+            except Exception as e:
+                self.dead_letter(job, e)
+            finally:
+                self.queue.task_done()
+
+    def dead_letter(self, job: OutboundJob, error: Exception):
+        print(f"❌ Giving up on {job.kind} for {job.target_id} after {job.attempts} attempt(s): {error}")
+        metrics.inc("outbound_dead_letters_total", kind=job.kind)
+        store.add_dead_letter(job.kind, job.guild_id, job.target_id, f"{type(error).__name__}: {error}")
+        if job.on_done:
+            job.on_done(error)
+
+outbound = OutboundQueue()
+
+def post_to_log_channel(guild_id: int, embeds: list, applicant_id: int):
+    # Queues one message for the guild's log channel; applicant_id is what a dead letter records
+    async def send():
+        log_channel = log_channels.get(guild_id)
+        if log_channel:
+            try:
+                await log_channel.send(embeds=embeds)
+            except discord.NotFound:
+                log_channels.invalidate(guild_id)
+                raise
+    outbound.put(LOG_PRIORITY, OutboundJob("log", guild_id, applicant_id, send))
+
+class LogBatcher:
+    # Decision embeds for a guild's log channel are collected for LOG_BATCH_WINDOW seconds and
+    # posted together, up to Discord's 10 embeds / 6000 characters per message. Batches go out
+    # through the outbound queue; close() posts whatever is still waiting.
+    MAX_EMBEDS = 10
+    MAX_CHARACTERS = 6000
+
+    def __init__(self, window: float):
+        self.window = window
+        self.batches = {}  # guild_id: [(applicant_id, embed)]
+        self.sizes = {}    # guild_id: total embed characters in the batch
+        self.timers = {}   # guild_id: flush timer handle
+
+    def add(self, guild_id: int, applicant_id: int, embed: discord.Embed, hold: bool = False):
+        # hold=True batches even without a window; the caller flushes when it is done adding
+        if not self.window and not hold:
+            self._post(guild_id, [(applicant_id, embed)])
+            return
+        if self.sizes.get(guild_id, 0) + len(embed) > self.MAX_CHARACTERS:
+            self.flush(guild_id)
+        batch = self.batches.setdefault(guild_id, [])
+        batch.append((applicant_id, embed))
+        self.sizes[guild_id] = self.sizes.get(guild_id, 0) + len(embed)
+        if len(batch) >= self.MAX_EMBEDS:
+            self.flush(guild_id)
+        elif self.window and guild_id not in self.timers:
+            self.timers[guild_id] = asyncio.get_running_loop().call_later(self.window, self.flush, guild_id)
+
+    def flush(self, guild_id: int):
+        timer = self.timers.pop(guild_id, None)
+        if timer:
+            timer.cancel()
+        self.sizes.pop(guild_id, None)
+        batch = self.batches.pop(guild_id, None)
+        if batch:
+            self._post(guild_id, batch)
+
+    def close(self):
+        for guild_id in list(self.batches):
+            self.flush(guild_id)
+
+    def _post(self, guild_id: int, batch: list):
+        # Dead letters name the first applicant in the batch
+        post_to_log_channel(guild_id, [embed for _, embed in batch], batch[0][0])
+
+log_batcher = LogBatcher(LOG_BATCH_WINDOW)
+
+class CooldownIndex:
+    # (scope, user_id) -> cooldown expiry as epoch seconds. Lookups are O(1); a min-heap of
+    # expiries lets the sweeper evict entries as soon as their window has passed.
+    def __init__(self):
+        self.expires = {}
+        self.heap = []  # (expiry, scope, user_id); may hold stale entries for re-declined users
+        self.global_count = 0
+
+    def add(self, scope: int, user_id: int, expires: float):
+        if expires <= time.time():
+            return
+        if (scope, user_id) not in self.expires and scope == GLOBAL_SCOPE:
+            self.global_count += 1
+        self.expires[(scope, user_id)] = expires
+        heapq.heappush(self.heap, (expires, scope, user_id))
+
+    def remaining(self, scope: int, user_id: int) -> float:
+        # Seconds left on the cooldown, 0 if there is none
+        expires = self.expires.get((scope, user_id))
+        if expires is None:
+            return 0
+        remaining = expires - time.time()
+        return remaining if remaining > 0 else 0
+
+    def evict(self, now: float = None) -> int:
+        now = time.time() if now is None else now
+        evicted = 0
+        while self.heap and self.heap[0][0] <= now:
+            expires, scope, user_id = heapq.heappop(self.heap)
+            if self.expires.get((scope, user_id)) == expires:
+                del self.expires[(scope, user_id)]
+                if scope == GLOBAL_SCOPE:
+                    self.global_count -= 1
+                evicted += 1
+        return evicted
+
+    def counts(self) -> dict:
+        return {
+            "global": self.global_count,
+            "server": len(self.expires) - self.global_count,
+            "heap": len(self.heap),
+        }
+
+cooldowns = CooldownIndex()
+
+def cooldown_remaining(scope: int, user_id: int) -> float:
+    # Another shard process may have declined this user globally since our index was loaded
+    if scope == GLOBAL_SCOPE and SHARED_STATE:
+        expires = store.get_decline_expiry(scope, user_id)
+        return max(0.0, expires - time.time()) if expires else 0
+    return cooldowns.remaining(scope, user_id)
+
+class GuildStats:
+    __slots__ = ("outcomes", "moderators", "decision_time", "hourly")
+
+    def __init__(self):
+        self.outcomes = {}       # (role, action): decisions
+        self.moderators = {}     # moderator mention (or legacy name): [accepted, declined]
+        self.decision_time = {}  # role: [total seconds from submission to decision, decisions timed]
+        self.hourly = {}         # hour since epoch: [accepted, declined], last STATS_WINDOW_HOURS only
+
+class DecisionStats:
+    # Counters updated on every decision, so /application_stats never scans history.
+    # Rebuilt from the store once at startup; GLOBAL_SCOPE aggregates every guild.
+    def __init__(self):
+        self.guilds = {}
+
+    def rebuild(self, rows):
+        self.guilds.clear()
+        for guild_id, _, entry in rows:
+            self.record(guild_id, entry)
+
+    def record(self, guild_id: int, entry: HistoryEntry):
+        index = 0 if entry.action is Action.ACCEPTED else 1
+        hour = entry.date // 3600
+        oldest = epoch_now() // 3600 - STATS_WINDOW_HOURS
+        for scope in (guild_id, GLOBAL_SCOPE):
+            stats = self.guilds.get(scope)
+            if stats is None:
+                stats = self.guilds[scope] = GuildStats()
+            key = (entry.role, entry.action)
+            stats.outcomes[key] = stats.outcomes.get(key, 0) + 1
+            stats.moderators.setdefault(entry.moderator, [0, 0])[index] += 1
+            if entry.submitted:
+                timing = stats.decision_time.setdefault(entry.role, [0, 0])
+                timing[0] += entry.date - entry.submitted
+                timing[1] += 1
+            if hour > oldest:
+                stats.hourly.setdefault(hour, [0, 0])[index] += 1
+                if len(stats.hourly) > STATS_WINDOW_HOURS:
+                    for stale in [h for h in stats.hourly if h <= oldest]:
+                        del stats.hourly[stale]
+
+    def get(self, guild_id: int):
+        return self.guilds.get(guild_id)
+
+    @staticmethod
+    def window(stats: GuildStats, hours: int) -> tuple:
+        # (accepted, declined) over the last `hours`, at most STATS_WINDOW_HOURS buckets to add up
+        now = epoch_now() // 3600
+        accepted = declined = 0
+        for hour in range(now - hours + 1, now + 1):
+            bucket = stats.hourly.get(hour)
+            if bucket:
+                accepted += bucket[0]
+                declined += bucket[1]
+        return accepted, declined
+
+stats = DecisionStats()
+
+def decline_cooldown(guild_id: int) -> timedelta:
+    if guild_id == GLOBAL_SCOPE:
+        return GLOBAL_DECLINE_COOLDOWN
+    return guild_configs.get(guild_id).decline_cooldown
+
+def format_hours(duration: timedelta) -> str:
+    return f"{duration.total_seconds() / 3600:g}"
+
+def record_decline(guild_id: int, user_id: int):
+    now = datetime.utcnow()
+    for scope in (GLOBAL_SCOPE, guild_id):
+        expires = now + decline_cooldown(scope)
+        store.set_declined(scope, user_id, now, expires)
+        cooldowns.add(scope, user_id, to_epoch(expires))
+
+def new_submission_id() -> int:
+    # Snowflake-shaped id: creation time in the high bits, random low bits
+    return discord.utils.time_snowflake(discord.utils.utcnow()) | random.getrandbits(22)
+
+def submitted_at(submission_id: int) -> int:
+    return int(discord.utils.snowflake_time(submission_id).timestamp())
+
+def notify_applicant(guild_id: int, applicant_id: int, embed: discord.Embed, on_done=None):
+    async def send():
+        applicant = bot.get_user(applicant_id) or await bot.fetch_user(applicant_id)
+        await applicant.send(embed=embed)
+    outbound.put(DM_PRIORITY, OutboundJob("dm", guild_id, applicant_id, send, on_done))
+
+def decision_embed(guild_id: int, role_type: str, action: Action, reason: str = None) -> discord.Embed:
+    # What the applicant is sent
+    if action is Action.ACCEPTED:
+        if reason:
+            description = f"Your application for **{role_type}** has been accepted.\n\n**Reason:** {reason}"
+        else:
+            description = f"Congratulations! Your application for **{role_type}** has been accepted."
+        return discord.Embed(title="✅ Application Accepted", description=description, color=discord.Color.green())
+    if reason:
+        description = f"Your application has been declined.\n\n**Reason:** {reason}\n"
+    else:
+        description = "Your application has been declined. "
+    global_hours = format_hours(decline_cooldown(GLOBAL_SCOPE))
+    guild_hours = format_hours(decline_cooldown(guild_id))
+    return discord.Embed(
+        title="❌ Application Declined",
+        description=description + f"You can open a new application in the next {global_hours} hours (globally) or {guild_hours} hours (in this server).",
+        color=discord.Color.red()
+    )
+
+def log_decision(guild_id: int, applicant_id: int, submission_id: int, role_type: str, moderator: discord.abc.User, action: Action, reason: str = None, hold_log: bool = False):
+    # Record the decision right away; the log post is queued
+    entry = HistoryEntry(action, role_type, epoch_now(), moderator.id, reason, submitted_at(submission_id))
+    store.add_history(guild_id, applicant_id, entry)
+    stats.record(guild_id, entry)
+    store.pop_pending(guild_id, applicant_id, submission_id)
+
+    # Start the global and server-specific cooldowns if declined
+    if action is Action.DECLINED:
+        record_decline(guild_id, applicant_id)
+
+    embed = discord.Embed(
+        title=f"Application {action.value.capitalize()}",
+        color=discord.Color.green() if action is Action.ACCEPTED else discord.Color.red()
+    )
+    embed.add_field(name="Applicant", value=f"<@{applicant_id}> ({applicant_id})", inline=False)
+    embed.add_field(name="Role", value=role_type, inline=False)
+    embed.add_field(name="Moderator", value=moderator.mention, inline=False)
+    if reason:
+        embed.add_field(name="Reason", value=reason, inline=False)
+    embed.timestamp = datetime.utcnow()
+    log_batcher.add(guild_id, applicant_id, embed, hold_log)
+
+decision_followups = set()  # "couldn't DM" followups still being sent
+
+async def decide(interaction: discord.Interaction, guild_id: int, applicant_id: int, submission_id: int, action: str, reason: str = None):
+    # Check if this application has already been processed
+    pending = store.get_pending(guild_id, applicant_id, submission_id)
+    if not pending:
+        await interaction.response.send_message("⚠️ This application has already been processed.", ephemeral=True)
+        return
+    role_type = pending.role_type
+    with_reason = " with reason" if reason else ""
+
+    async def report_undelivered():
+        verb = "Accepted" if action == "accept" else "Declined"
+        with contextlib.suppress(discord.HTTPException):
+            await interaction.followup.send(f"⚠️ {verb}, but couldn't DM the applicant.", ephemeral=True)
+
+    def done(error):
+        # The DM goes out after the moderator has been answered, so a failure is a followup
+        if error is not None:
+            task = asyncio.create_task(report_undelivered())
+            decision_followups.add(task)
+            task.add_done_callback(decision_followups.discard)
+
+    # Record and queue the applicant DM and log post first, so a failed ack can't leave a decided
+    # application without its notification; then answer the moderator
+    if action == "accept":
+        log_decision(guild_id, applicant_id, submission_id, role_type, interaction.user, Action.ACCEPTED, reason)
+        notify_applicant(guild_id, applicant_id, decision_embed(guild_id, role_type, Action.ACCEPTED, reason), on_done=done)
+        await interaction.response.send_message(f"✅ Applicant accepted and will be notified{with_reason}.", ephemeral=True)
+    elif action == "decline":
+        log_decision(guild_id, applicant_id, submission_id, role_type, interaction.user, Action.DECLINED, reason)
+        notify_applicant(guild_id, applicant_id, decision_embed(guild_id, role_type, Action.DECLINED, reason), on_done=done)
+        await interaction.response.send_message(f"❌ Applicant declined and will be notified{with_reason}.", ephemeral=True)
+
 class ReasonModal(ui.Modal, title="Enter Reason"):
-    def __init__(self, action: str, applicant: discord.User, role_type: str, interaction: discord.Interaction, message_id: int, guild_id: int):
+    def __init__(self, action: str, guild_id: int, applicant_id: int, submission_id: int):
         super().__init__()
         self.action = action  # 'accept' or 'decline'
-        self.applicant = applicant
-        self.role_type = role_type
-        self.interaction = interaction
-        self.message_id = message_id
         self.guild_id = guild_id
+        self.applicant_id = applicant_id
+        self.submission_id = submission_id
+
+        self.reason = ui.TextInput(label="Reason", style=discord.TextStyle.paragraph, required=True, max_length=300)
+        self.add_item(self.reason)
+
+    @instrumented("view")
+    async def on_submit(self, interaction: discord.Interaction):
+        await decide(interaction, self.guild_id, self.applicant_id, self.submission_id, self.action, self.reason.value)
+
+class ReviewButton(ui.DynamicItem[ui.Button], template=r"review:(?P<action>[a-z_]+):(?P<guild_id>\d+):(?P<applicant_id>\d+):(?P<submission_id>\d+)"):
+    # Everything a click needs is encoded in the custom_id, so review buttons keep working
+    # across restarts without keeping a view per application in memory
+    ACTIONS = {
+        "accept": ("Accept", discord.ButtonStyle.success, 0),
+        "decline": ("Decline", discord.ButtonStyle.danger, 0),
+        "accept_reason": ("Accept with Reason", discord.ButtonStyle.success, 1),
+        "decline_reason": ("Decline with Reason", discord.ButtonStyle.danger, 1),
+    }
+
+    def __init__(self, action: str, guild_id: int, applicant_id: int, submission_id: int):
+        label, style, row = self.ACTIONS[action]
+        super().__init__(ui.Button(
+            label=label,
+            style=style,
+            row=row,
+            custom_id=f"review:{action}:{guild_id}:{applicant_id}:{submission_id}"
+        ))
+        self.action = action
+        self.guild_id = guild_id
+        self.applicant_id = applicant_id
+        self.submission_id = submission_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        if match["action"] not in cls.ACTIONS:
+            raise ValueError(f"Unknown review action {match['action']}")
+        return cls(match["action"], int(match["guild_id"]), int(match["applicant_id"]), int(match["submission_id"]))
+
+    @instrumented("view")
+    async def callback(self, interaction: discord.Interaction):
+        if self.action in ("accept_reason", "decline_reason"):
+            if not store.get_pending(self.guild_id, self.applicant_id, self.submission_id):
+                await interaction.response.send_message("⚠️ This application has already been processed.", ephemeral=True)
+                return
+            modal = ReasonModal(self.action.split("_")[0], self.guild_id, self.applicant_id, self.submission_id)
+            await interaction.response.send_modal(modal)
+        else:
+            await decide(interaction, self.guild_id, self.applicant_id, self.submission_id, self.action)
+
+class ReviewView(ui.View):
+    def __init__(self, guild_id: int, applicant_id: int, submission_id: int):
+        super().__init__(timeout=None)
+        for action in ReviewButton.ACTIONS:
+            self.add_item(ReviewButton(action, guild_id, applicant_id, submission_id))
+
+class TimerWheel:
+    # Hashed timer wheel driven by a single task. Scheduling, rescheduling and cancelling are O(1).
+    def __init__(self, on_expire, tick: float = 1.0, slots: int = 512):
+        self.on_expire = on_expire
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]  # slot: {key: due_tick}
+        self.due = {}  # key: due_tick
+        self.current = 0
+        self._task = None
+
+    def schedule(self, key, delay: float):
+        self.cancel(key)
+        due = self.current + max(1, int(-(-delay // self.tick)))
+        self.slots[due % len(self.slots)][key] = due
+        self.due[key] = due
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def cancel(self, key):
+        due = self.due.pop(key, None)
+        if due is not None:
+            self.slots[due % len(self.slots)].pop(key, None)
+
+    def __len__(self):
+        return len(self.due)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while self.due:
+            await asyncio.sleep(self.tick)
+            # Catch up on every tick that elapsed, even if the loop was busy
+            while self.current < int((loop.time() - start) / self.tick):
+                self.current += 1
+                bucket = self.slots[self.current % len(self.slots)]
+                for key, due in list(bucket.items()):
+                    if due <= self.current:
+                        del bucket[key]
+                        del self.due[key]
+                        self.on_expire(key)
+        self._task = None
+        self.current = 0
+
+class RateLimiter:
+    # Token buckets by key: `burst` clicks at once, refilled at `per_minute`. Only the most recently
+    # used max_keys buckets are kept; one that falls out had been idle long enough to be full again.
+    def __init__(self, per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key: (tokens, updated)
+
+    def retry_after(self, key) -> float:
+        # Takes a token and returns 0, or returns the seconds until one is available
+        if self.rate <= 0:
+            return 0
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        retry = 0 if tokens >= 1 else (1 - tokens) / self.rate
+        self.buckets[key] = (tokens if retry else tokens - 1, now)
+        if len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return retry
+
+user_limiter = RateLimiter(APPLY_USER_RATE, APPLY_USER_BURST)
+guild_limiter = RateLimiter(APPLY_GUILD_RATE, APPLY_GUILD_BURST)
+
+async def admit(interaction: discord.Interaction, guild_id: int = None) -> bool:
+    # Rate limits every application entry point; answers the interaction and returns False when over
+    retry = user_limiter.retry_after(interaction.user.id)
+    if retry:
+        metrics.inc("application_admission_rejected_total", reason="user_rate")
+        await interaction.response.send_message(f"⏳ You're doing that too fast. Try again in {math.ceil(retry)}s.", ephemeral=True)
+        return False
+    retry = guild_limiter.retry_after(guild_id) if guild_id else 0
+    if retry:
+        metrics.inc("application_admission_rejected_total", reason="guild_rate")
+        await interaction.response.send_message(
+            f"⏳ This server is receiving a lot of applications right now. Please try again in {math.ceil(retry)}s.",
+            ephemeral=True
+        )
+        return False
+    return True
+
+class QuestionnaireSession:
+    def __init__(self, user: discord.User, guild_id: int, role_type: str, qlist: list, answers: list):
+        self.user = user
+        self.guild_id = guild_id
+        self.role_type = role_type
+        self.qlist = qlist
+        self.answers = answers
+        self.waiting = False  # only accept an answer once its question has been sent
+        self.has_slot = False  # counted against MAX_ACTIVE_SESSIONS
+        self.admitted = None   # future resolved when a queued session is handed a slot
+        self.done = asyncio.get_running_loop().create_future()
+
+class SessionManager:
+    # Routes applicant DMs to their questionnaire through one on_message listener. Each user has at
+    # most one session; at most `capacity` ask questions at once and the rest wait in line, in order.
+    def __init__(self, timeout: float = QUESTION_TIMEOUT, capacity: int = MAX_ACTIVE_SESSIONS, max_queued: int = MAX_QUEUED_SESSIONS):
+        self.timeout = timeout
+        self.capacity = capacity
+        self.max_queued = max_queued
+        self.sessions = {}  # user_id: QuestionnaireSession
+        self.active = 0     # sessions holding a slot
+        self.queue = deque()  # sessions waiting for a slot
+        self.timers = TimerWheel(self._expire)
+
+    def full(self) -> bool:
+        return self.active >= self.capacity and len(self.queue) >= self.max_queued
+
+    def position(self, session: QuestionnaireSession) -> int:
+        # 1-based place in line, 0 once the session is asking questions
+        return 0 if session.has_slot else self.queue.index(session) + 1
+
+    def begin(self, user: discord.User, guild_id: int, role_type: str, qlist: list, answers: list = None):
+        # Reserve the applicant's session; returns None if they already have one running.
+        # Passing the answers of a checkpoint resumes from the first unanswered question.
+        if user.id in self.sessions:
+            return None
+        if answers is None:
+            store.start_checkpoint(user.id, guild_id, role_type)
+        session = QuestionnaireSession(user, guild_id, role_type, qlist, list(answers or []))
+        self.sessions[user.id] = session
+        if self.active < self.capacity and not self.queue:
+            self.active += 1
+            session.has_slot = True
+        else:
+            session.admitted = asyncio.get_running_loop().create_future()
+            self.queue.append(session)
+        return session
+
+    async def run(self, session: QuestionnaireSession):
+        # Returns the list of (question, answer) pairs, or None if the applicant timed out
+        try:
+            if len(session.answers) >= len(session.qlist):
+                return session.answers
+            if not session.has_slot:
+                # The question timeout only starts once there is a slot to ask from
+                await session.admitted
+                await session.user.send("✅ It's your turn! Here's your first question.")
+            await self._ask(session)
+            return await session.done
+        finally:
+            self._end(session)
+            self._release(session)
+
+    def _release(self, session: QuestionnaireSession):
+        if not session.has_slot:
+            if session in self.queue:
+                self.queue.remove(session)
+            return
+        session.has_slot = False
+        # Hand the slot straight to the next applicant in line
+        while self.queue:
+            waiting = self.queue.popleft()
+            if not waiting.admitted.done():
+                waiting.has_slot = True
+                waiting.admitted.set_result(None)
+                return
+        self.active -= 1
+
+    def _end(self, session: QuestionnaireSession):
+        if self.sessions.get(session.user.id) is session:
+            self.timers.cancel(session.user.id)
+            del self.sessions[session.user.id]
+
+    async def _ask(self, session: QuestionnaireSession):
+        await session.user.send(session.qlist[len(session.answers)])
+        session.waiting = True
+        self.timers.schedule(session.user.id, self.timeout)
+
+    async def handle(self, message: discord.Message):
+        session = self.sessions.get(message.author.id)
+        if session is None or not session.waiting or session.done.done():
+            return
+        limit = answer_limit(session.qlist)
+        if len(message.content) > limit:
+            # Keep waiting for a shorter answer to the same question
+            try:
+                await session.user.send(f"⚠️ Please keep each answer under {limit} characters and send it again.")
+            except discord.HTTPException as e:
+                session.done.set_exception(e)
+            return
+        session.waiting = False
+        question = session.qlist[len(session.answers)]
+        store.add_checkpoint_answer(session.user.id, len(session.answers), question, message.content)
+        session.answers.append((question, message.content))
+        if len(session.answers) < len(session.qlist):
+            try:
+                await self._ask(session)
+            except discord.HTTPException as e:
+                session.done.set_exception(e)
+        else:
+            session.done.set_result(session.answers)
+
+    def _expire(self, user_id: int):
+        session = self.sessions.get(user_id)
+        if session:
+            self._end(session)
+            if not session.done.done():
+                session.done.set_result(None)
+
+sessions = SessionManager()
+
+class LogChannelResolver:
+    # guild_id -> log channel (or None), invalidated by channel events. A guild can pin its
+    # log channel by ID with /application_logchannel; otherwise it is looked up by name.
+    def __init__(self):
+        self.channels = {}
+
+    def get(self, guild_id: int):
+        if guild_id in self.channels:
+            return self.channels[guild_id]
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            return None
+        channel_id = guild_configs.get(guild_id).log_channel_id
+        if channel_id:
+            channel = guild.get_channel(channel_id)
+        else:
+            channel = discord.utils.get(guild.text_channels, name=LOG_CHANNEL_NAME)
+        if channel is None:
+            print(f"⚠️ No application log channel found in {guild} ({guild_id})")
+        self.channels[guild_id] = channel
+        return channel
+
+    def invalidate(self, guild_id: int):
+        self.channels.pop(guild_id, None)
+
+log_channels = LogChannelResolver()
+
+class ReviewerIndex:
+    # guild_id -> ids of members holding the Dev role, built once from the role object and
+    # kept up to date from member/role events instead of scanning guild.members per submission.
+    # With the lazy member cache the list comes from a one-off uncached chunk of that guild, and role
+    # changes are read off every GUILD_MEMBER_UPDATE payload, since discord.py drops updates for
+    # uncached members without an event. Known holders are re-checked with query_members after
+    # REVIEWER_INDEX_TTL, which catches anyone whose role was removed while the gateway was down.
+    def __init__(self):
+        self.members = {}
+        self.role_ids = {}  # guild_id: Dev role id the list was built for
+        self.built = {}     # guild_id: monotonic time the list was built or last re-checked
+        self.building = {}  # guild_id: build/refresh task shared by concurrent callers
+
+    def watch(self, state):
+        parse = state.parsers["GUILD_MEMBER_UPDATE"]
+        def parse_member_update(data):
+            self._member_update(int(data["guild_id"]), int(data["user"]["id"]), data.get("roles", ()))
+            parse(data)
+        state.parsers["GUILD_MEMBER_UPDATE"] = parse_member_update
+
+    def _member_update(self, guild_id: int, user_id: int, role_ids):
+        ids = self.members.get(guild_id)
+        role_id = self.role_ids.get(guild_id)
+        if ids is None or role_id is None:
+            return
+        if str(role_id) in role_ids:
+            ids.add(user_id)
+        else:
+            ids.discard(user_id)
+
+    async def get(self, guild: discord.Guild) -> set:
+        ids = self.members.get(guild.id)
+        if ids is not None and (MEMBER_CACHE != "lazy" or time.monotonic() - self.built[guild.id] < REVIEWER_INDEX_TTL):
+            return ids
+        task = self.building.get(guild.id)
+        if task is None:
+            work = self._build(guild) if ids is None else self._refresh(guild)
+            task = self.building[guild.id] = asyncio.create_task(work)
+            task.add_done_callback(lambda _: self.building.pop(guild.id, None))
+        if ids is not None:
+            return ids  # serve the current list while the holders are re-checked
+        try:
+            return await asyncio.shield(task)
+        except (asyncio.TimeoutError, discord.HTTPException, discord.ClientException) as e:
+            print(f"Failed to load {DEV_ROLE_NAME} members for {guild} ({guild.id}): {e}")
+            return set()
+
+    async def _build(self, guild: discord.Guild) -> set:
+        role = discord.utils.get(guild.roles, name=DEV_ROLE_NAME)
+        if role is None:
+            ids = set()
+        elif MEMBER_CACHE == "lazy" and not guild.chunked:
+            members = await guild.chunk(cache=False)
+            ids = {member.id for member in members if member.get_role(role.id)}
+            del members
+            uncached = [user_id for user_id in ids if guild.get_member(user_id) is None]
+            for i in range(0, len(uncached), 100):
+                await guild.query_members(user_ids=uncached[i:i + 100], cache=True)
+        else:
+            ids = {member.id for member in role.members}
+            if not guild.chunked:
+                # Startup chunking hasn't finished this guild, so role.members is partial and the
+                # members it loads fire no update events; use it this once without caching it
+                return ids
+        self.members[guild.id] = ids
+        self.role_ids[guild.id] = role.id if role else None
+        self.built[guild.id] = time.monotonic()
+        return ids
+
+    async def _refresh(self, guild: discord.Guild):
+        # Only the known holders are fetched; members who left or lost the role are dropped
+        ids = self.members.get(guild.id)
+        role_id = self.role_ids.get(guild.id)
+        if ids is None:
+            return
+        try:
+            if role_id is not None:
+                holders = list(ids)
+                for i in range(0, len(holders), 100):
+                    batch = holders[i:i + 100]
+                    members = await guild.query_members(user_ids=batch, cache=True)
+                    still = {member.id for member in members if member.get_role(role_id)}
+                    ids.difference_update(user_id for user_id in batch if user_id not in still)
+        except (asyncio.TimeoutError, discord.HTTPException, discord.ClientException) as e:
+            print(f"Failed to re-check {DEV_ROLE_NAME} members for {guild} ({guild.id}): {e}")
+        self.built[guild.id] = time.monotonic()
+
+    def update(self, member: discord.Member):
+        ids = self.members.get(member.guild.id)
+        if ids is None:
+            return
+        if any(role.name == DEV_ROLE_NAME for role in member.roles):
+            ids.add(member.id)
+        else:
+            ids.discard(member.id)
+
+    def remove(self, guild_id: int, user_id: int):
+        self.members.get(guild_id, set()).discard(user_id)
+
+    def invalidate(self, guild_id: int):
+        self.members.pop(guild_id, None)
+        self.role_ids.pop(guild_id, None)
+        self.built.pop(guild_id, None)
+
+reviewers = ReviewerIndex()
+
+class NotificationDispatcher:
+    # Fans reviewer DMs out in the background. discord.py already queues requests per rate-limit
+    # bucket; the semaphore keeps a submission from flooding the shared DM-channel route.
+    def __init__(self, concurrency: int = REVIEWER_DM_CONCURRENCY):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks = set()
+        self.failures = deque(maxlen=200)  # (datetime, guild_id, user_id, error)
+
+    def notify_reviewers(self, guild: discord.Guild, content: str):
+        task = asyncio.create_task(self._fan_out(guild, content))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _fan_out(self, guild: discord.Guild, content: str) -> list:
+        recipients = await reviewers.get(guild)
+        results = await asyncio.gather(*(self._send(guild, user_id, content) for user_id in list(recipients)))
+        failures = [(datetime.utcnow(), guild.id, user_id, error) for user_id, error in results if error]
+        self.failures.extend(failures)
+        return failures
+
+    async def _send(self, guild: discord.Guild, user_id: int, content: str):
+        async with self.semaphore:
+            try:
+                member = guild.get_member(user_id)
+                if member is None:
+                    # Evicted or never cached: confirm they still hold the role before messaging them
+                    member = await guild.fetch_member(user_id)
+                    if not any(role.name == DEV_ROLE_NAME for role in member.roles):
+                        reviewers.remove(guild.id, user_id)
+                        return user_id, None
+                await member.send(content)
+            except discord.NotFound as e:
+                reviewers.remove(guild.id, user_id)
+                return user_id, e
+            except discord.HTTPException as e:
+                return user_id, e
+        return user_id, None
+
+notifier = NotificationDispatcher()
+
+class PendingReminders:
+    # Reminds a guild's log channel about applications waiting longer than PENDING_REMINDER_HOURS.
+    # One task serves every application: it sleeps until the earliest one comes due. Decided
+    # applications stay in the heap and are skipped when their time comes. Each guild keeps a
+    # "reminded_through" submission id, so a restart doesn't repeat reminders.
+    MAX_LISTED = 20
+
+    def __init__(self, hours: float):
+        self.delay = hours * 3600
+        self.heap = []  # (due, guild_id, submission_id, user_id)
+        self._wakeup = None
+        self._task = None
 
-        self.reason = ui.TextInput(label="Reason", style=discord.TextStyle.paragraph, required=True, max_length=300)
-        self.add_item(self.reason)
+    def start(self, pending):
+        if not self.delay:
+            return
+        self.heap = [(submitted_at(info.submission_id) + self.delay, info.guild_id, info.submission_id, user_id) for user_id, info in pending]
+        heapq.heapify(self.heap)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
 
-    async def on_submit(self, interaction: discord.Interaction):
-        # Check if this application has already been processed
-        if self.applicant.id in pending_applications and pending_applications[self.applicant.id].get("message_id") == self.message_id:
-            reason_text = self.reason.value
+    def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
 
-            # Initialize server data if not exists
-            if self.guild_id not in server_data:
-                server_data[self.guild_id] = {'declined': {}, 'banned': {}, 'history': {}}
+    def add(self, user_id: int, info: PendingApplication):
+        if self._task is None:
+            return
+        entry = (submitted_at(info.submission_id) + self.delay, info.guild_id, info.submission_id, user_id)
+        heapq.heappush(self.heap, entry)
+        if self.heap[0] is entry:
+            self._wakeup.set()
 
-            # Notify applicant & mods
-            if self.action == "accept":
-                try:
-                    await self.applicant.send(embed=discord.Embed(
-                        title="✅ Application Accepted",
-                        description=f"Your application for **{self.role_type}** has been accepted.\n\n**Reason:** {reason_text}",
-                        color=discord.Color.green()
-                    ))
-                    await self.log_decision(interaction, "accepted", reason_text)
-                    await interaction.response.send_message("✅ Applicant accepted and notified with reason.", ephemeral=True)
-                except discord.Forbidden:
-                    await interaction.response.send_message("✅ Accepted but couldn't DM the applicant.", ephemeral=True)
-            elif self.action == "decline":
-                # Add to both global and server-specific decline records
-                global_declined[self.applicant.id] = datetime.utcnow()
-                server_data[self.guild_id]['declined'][self.applicant.id] = datetime.utcnow()
-                
+    async def _run(self):
+        # Guilds must be loaded to tell which ones this process (or shard worker) serves
+        await bot.wait_until_ready()
+        while True:
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+            if timeout is None or timeout > 0:
                 try:
-                    await self.applicant.send(embed=discord.Embed(
-                        title="❌ Application Declined",
-                        description=(
-                            f"Your application has been declined.\n\n**Reason:** {reason_text}\n"
-                            "You can open a new application in the next 48 hours (globally) or 24 hours (in this server)."
-                        ),
-                        color=discord.Color.red()
-                    ))
-                    await self.log_decision(interaction, "declined", reason_text)
-                    await interaction.response.send_message("❌ Applicant declined and notified with reason.", ephemeral=True)
-                except discord.Forbidden:
-                    await interaction.response.send_message("❌ Declined but couldn't DM the applicant.", ephemeral=True)
-            
-            # Remove from pending applications
-            if self.applicant.id in pending_applications:
-                pending_applications.pop(self.applicant.id)
-        else:
-            await interaction.response.send_message("⚠️ This application has already been processed.", ephemeral=True)
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                self._remind(self._pop_due(time.time()))
+            except Exception as e:
+                print(f"Failed to send pending application reminders: {e}")
 
-        self.stop()
+    def _pop_due(self, now: float) -> dict:
+        due = {}  # guild_id: [(user_id, PendingApplication)]
+        reminded = {}
+        while self.heap and self.heap[0][0] <= now:
+            _, guild_id, submission_id, user_id = heapq.heappop(self.heap)
+            if bot.get_guild(guild_id) is None:
+                continue
+            if guild_id not in reminded:
+                reminded[guild_id] = int(store.get_setting(guild_id, "reminded_through") or 0)
+            if submission_id <= reminded[guild_id]:
+                continue
+            info = store.get_pending(guild_id, user_id, submission_id)
+            if info:
+                due.setdefault(guild_id, []).append((user_id, info))
+        return due
 
-    async def log_decision(self, interaction: discord.Interaction, action: str, reason: str = None):
-        # Add to server history
-        if self.applicant.id not in server_data[self.guild_id]['history']:
-            server_data[self.guild_id]['history'][self.applicant.id] = []
-        
-        server_data[self.guild_id]['history'][self.applicant.id].append({
-            "action": action,
-            "role": self.role_type,
-            "date": datetime.utcnow(),
-            "moderator": interaction.user.name,
-            "reason": reason
-        })
-        
-        # Find the log channel
-        log_channel = None
-        guild = bot.get_guild(self.guild_id)
-        if guild:
-            log_channel = discord.utils.get(guild.text_channels, name=LOG_CHANNEL_NAME)
-        
-        if log_channel:
+    def _remind(self, due: dict):
+        now = epoch_now()
+        for guild_id, overdue in due.items():
+            store.set_setting(guild_id, "reminded_through", overdue[-1][1].submission_id)
+            lines = [
+                f"<@{user_id}> - {info.role_type} - waiting {format_duration(now - submitted_at(info.submission_id))}"
+                for user_id, info in overdue[:self.MAX_LISTED]
+            ]
+            if len(overdue) > self.MAX_LISTED:
+                lines.append(f"...and {len(overdue) - self.MAX_LISTED} more. See /application_queue.")
             embed = discord.Embed(
-                title=f"Application {action.capitalize()}",
-                color=discord.Color.green() if action == "accepted" else discord.Color.red()
+                title=f"⏰ {len(overdue)} application(s) waiting over {format_hours(timedelta(hours=self.delay / 3600))} hours",
+                description="\n".join(lines),
+                color=discord.Color.orange()
             )
-            embed.add_field(name="Applicant", value=f"{self.applicant} ({self.applicant.id})", inline=False)
-            embed.add_field(name="Role", value=self.role_type, inline=False)
-            embed.add_field(name="Moderator", value=interaction.user.mention, inline=False)
-            if reason:
-                embed.add_field(name="Reason", value=reason, inline=False)
-            embed.timestamp = datetime.utcnow()
-            
-            await log_channel.send(embed=embed)
+            post_to_log_channel(guild_id, [embed], overdue[0][0])
 
-class ReviewView(ui.View):
-    def __init__(self, applicant: discord.User, role_type: str, message_id: int, guild_id: int):
-        super().__init__(timeout=None)
-        self.applicant = applicant
+pending_reminders = PendingReminders(PENDING_REMINDER_HOURS)
+
+async def submit_application(user: discord.abc.User, guild_id: int, role_type: str, answers: list) -> bool:
+    # Post the answers for review; returns False if they couldn't reach the review channel
+    embed = discord.Embed(
+        title=f"{user} Application for {role_type}",
+        color=discord.Color.blue()
+    )
+    # Answers are capped as they are typed; this only trims ones saved before the cap existed
+    limit = answer_limit([q for q, _ in answers])
+    for q, a in answers:
+        embed.add_field(name=q, value=a if len(a) <= limit else a[:limit - 1] + "…", inline=False)
+    embed.set_footer(text=f"User ID: {user.id} | Guild ID: {guild_id}")
+
+    sent = False
+    guild = bot.get_guild(guild_id)
+    if guild:
+        channel = log_channels.get(guild_id)
+        if channel:
+            try:
+                # The @here ping rides along with the embed, one message per submission
+                submission_id = new_submission_id()
+                await channel.send("@here New application received!", embed=embed, view=ReviewView(guild_id, user.id, submission_id))
+                
+                # Track this pending application
+                pending = PendingApplication(submission_id, role_type, guild_id)
+                store.set_pending(user.id, pending)
+                pending_reminders.add(user.id, pending)
+                store.delete_checkpoint(user.id)
+                
+                sent = True
+            except Exception as e:
+                print(f"Failed to send application embed in channel: {e}")
+
+            notifier.notify_reviewers(guild, f"📨 {user} just submitted a **{role_type}** application.")
+    return sent
+
+SUBMITTED_EMBED = discord.Embed(
+    title="✅ Application Submitted",
+    description="Your application has been submitted. Thank you!",
+    color=discord.Color.green()
+)
+SUBMIT_FAILED_MESSAGE = "⚠️ Could not send your application to the review channel. Please notify staff."
+
+async def sweep_expired():
+    # Evict finished decline cooldowns and drop unfinished applications nobody came back to
+    while True:
+        await asyncio.sleep(60)
+        try:
+            cooldowns.evict()
+            store.purge_declines(datetime.utcnow())
+            store.purge_bans(epoch_now())
+            store.purge_dead_letters(datetime.utcnow() - DEAD_LETTER_RETENTION)
+            expired = store.expire_checkpoints(datetime.utcnow() - CHECKPOINT_TTL)
+            if expired:
+                print(f"Expired {expired} unfinished application(s).")
+        except Exception as e:
+            print(f"Failed to clean up expired application data: {e}")
+
+class QuestionPageModal(ui.Modal):
+    # Up to MODAL_PAGE_SIZE questions starting at the first unanswered one; pages are chained
+    # through ContinueFormView
+    def __init__(self, role_type: str, guild_id: int, qlist: tuple, answers: list):
+        start = len(answers)
+        page_count = -(-len(qlist) // MODAL_PAGE_SIZE)
+        # Titles are capped at 45 characters; shorten the role name so the page count stays visible
+        suffix = f" Application ({start // MODAL_PAGE_SIZE + 1}/{page_count})"
+        name = role_type if len(role_type) + len(suffix) <= 45 else role_type[:44 - len(suffix)] + "…"
+        super().__init__(title=name + suffix, timeout=QUESTION_TIMEOUT)
         self.role_type = role_type
-        self.message_id = message_id
         self.guild_id = guild_id
-        self.processed = False
-
-        # Initialize server data if not exists
-        if self.guild_id not in server_data:
-            server_data[self.guild_id] = {'declined': {}, 'banned': {}, 'history': {}}
+        self.qlist = qlist
+        self.answers = answers
+        self.page_questions = qlist[start:start + MODAL_PAGE_SIZE]
+        self.remaining = len(qlist) - start - len(self.page_questions)
+        self.inputs = []
+        limit = answer_limit(qlist)
+        for q in self.page_questions:
+            # Labels are capped at 45 characters, so long questions are repeated in the placeholder
+            text_input = ui.TextInput(
+                label=q if len(q) <= 45 else q[:44] + "…",
+                placeholder=q[:100] if len(q) > 45 else None,
+                style=discord.TextStyle.paragraph,
+                max_length=limit
+            )
+            self.inputs.append(text_input)
+            self.add_item(text_input)
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if self.processed or (self.applicant.id in pending_applications and pending_applications[self.applicant.id].get("message_id") != self.message_id):
-            await interaction.response.send_message("⚠️ This application has already been processed.", ephemeral=True)
-            return False
-        return True
+    @instrumented("view")
+    async def on_submit(self, interaction: discord.Interaction):
+        answers = list(self.answers)
+        if not answers:
+            store.start_checkpoint(interaction.user.id, self.guild_id, self.role_type)
+        for q, text_input in zip(self.page_questions, self.inputs):
+            store.add_checkpoint_answer(interaction.user.id, len(answers), q, text_input.value)
+            answers.append((q, text_input.value))
 
-    async def log_decision(self, interaction: discord.Interaction, action: str, reason: str = None):
-        # Add to server history
-        if self.applicant.id not in server_data[self.guild_id]['history']:
-            server_data[self.guild_id]['history'][self.applicant.id] = []
-        
-        server_data[self.guild_id]['history'][self.applicant.id].append({
-            "action": action,
-            "role": self.role_type,
-            "date": datetime.utcnow(),
-            "moderator": interaction.user.name,
-            "reason": reason
-        })
-        
-        # Add to global and server-specific data if declined
-        if action == "declined":
-            global_declined[self.applicant.id] = datetime.utcnow()
-            server_data[self.guild_id]['declined'][self.applicant.id] = datetime.utcnow()
-        
-        # Find the log channel
-        log_channel = None
-        guild = bot.get_guild(self.guild_id)
-        if guild:
-            log_channel = discord.utils.get(guild.text_channels, name=LOG_CHANNEL_NAME)
-        
-        if log_channel:
-            embed = discord.Embed(
-                title=f"Application {action.capitalize()}",
-                color=discord.Color.green() if action == "accepted" else discord.Color.red()
+        if self.remaining:
+            await interaction.response.send_message(
+                f"📝 Saved {len(answers)} of {len(answers) + self.remaining} answers.",
+                view=ContinueFormView(self.role_type, self.guild_id, self.qlist, answers),
+                ephemeral=True
             )
-            embed.add_field(name="Applicant", value=f"{self.applicant} ({self.applicant.id})", inline=False)
-            embed.add_field(name="Role", value=self.role_type, inline=False)
-            embed.add_field(name="Moderator", value=interaction.user.mention, inline=False)
-            if reason:
-                embed.add_field(name="Reason", value=reason, inline=False)
-            embed.timestamp = datetime.utcnow()
-            
-            await log_channel.send(embed=embed)
-
-    @ui.button(label="Accept", style=discord.ButtonStyle.success)
-    async def accept(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            await self.applicant.send(embed=discord.Embed(
-                title="✅ Application Accepted",
-                description=f"Congratulations! Your application for **{self.role_type}** has been accepted.",
-                color=discord.Color.green()
-            ))
-            await self.log_decision(interaction, "accepted")
-            await interaction.response.send_message("✅ Applicant accepted and notified.", ephemeral=True)
-            self.processed = True
-            if self.applicant.id in pending_applications:
-                pending_applications.pop(self.applicant.id)
-        except discord.Forbidden:
-            await interaction.response.send_message("✅ Accepted but couldn't DM the applicant.", ephemeral=True)
-        self.stop()
+            return
 
-    @ui.button(label="Decline", style=discord.ButtonStyle.danger)
-    async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
-        global_declined[self.applicant.id] = datetime.utcnow()
-        server_data[self.guild_id]['declined'][self.applicant.id] = datetime.utcnow()
-        try:
-            await self.applicant.send(embed=discord.Embed(
-                title="❌ Application Declined",
-                description=(
-                    "Your application has been declined. "
-                    "You can open a new application in the next 48 hours (globally) or 24 hours (in this server)."
-                ),
-                color=discord.Color.red()
-            ))
-            await self.log_decision(interaction, "declined")
-            await interaction.response.send_message("❌ Applicant declined and notified.", ephemeral=True)
-            self.processed = True
-            if self.applicant.id in pending_applications:
-                pending_applications.pop(self.applicant.id)
-        except discord.Forbidden:
-            await interaction.response.send_message("❌ Declined but couldn't DM the applicant.", ephemeral=True)
-        self.stop()
+        await submit_form(interaction, self.guild_id, self.role_type, answers)
+
+async def submit_form(interaction: discord.Interaction, guild_id: int, role_type: str, answers: list):
+    # Submits from a button or modal, where the applicant gets their confirmation ephemerally
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    if await submit_application(interaction.user, guild_id, role_type, answers):
+        await interaction.followup.send(embed=SUBMITTED_EMBED, ephemeral=True)
+    else:
+        await interaction.followup.send(SUBMIT_FAILED_MESSAGE, ephemeral=True)
+
+class ContinueFormView(ui.View):
+    def __init__(self, role_type: str, guild_id: int, qlist: tuple, answers: list):
+        super().__init__(timeout=QUESTION_TIMEOUT)
+        self.role_type = role_type
+        self.guild_id = guild_id
+        self.qlist = qlist
+        self.answers = answers
 
-    @ui.button(label="Accept with Reason", style=discord.ButtonStyle.success, row=1)
-    async def accept_reason(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = ReasonModal("accept", self.applicant, self.role_type, interaction, self.message_id, self.guild_id)
-        await interaction.response.send_modal(modal)
+    @ui.button(label="Continue", style=discord.ButtonStyle.primary)
+    @instrumented("view")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(QuestionPageModal(self.role_type, self.guild_id, self.qlist, self.answers))
+        self.stop()
 
-    @ui.button(label="Decline with Reason", style=discord.ButtonStyle.danger, row=1)
-    async def decline_reason(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = ReasonModal("decline", self.applicant, self.role_type, interaction, self.message_id, self.guild_id)
-        await interaction.response.send_modal(modal)
+def session_in_progress(session: QuestionnaireSession) -> str:
+    guild = bot.get_guild(session.guild_id)
+    message = f"⚠️ You already have a {session.role_type} application in progress"
+    message += f" for {guild.name}." if guild else "."
+    position = sessions.position(session)
+    if position:
+        return message + f" You're #{position} in line; I'll DM you the first question when it's your turn."
+    return message + " Please answer the questions in your DMs."
 
 class StartApplicationView(ui.View):
-    def __init__(self, role_type: str, guild_id: int):
+    # qlist is the guild's question set when the applicant picked the role, so edits made
+    # mid-application don't shift the questions under them
+    def __init__(self, role_type: str, guild_id: int, qlist: tuple, resumable: bool = False):
         super().__init__(timeout=None)
         self.role_type = role_type
         self.guild_id = guild_id
+        self.qlist = qlist
+        if QUESTIONNAIRE_MODE != "modal":
+            self.remove_item(self.start_form)
+        else:
+            # The form replaces the DM questionnaire, which also needs the applicant's DMs open
+            self.remove_item(self.start)
+        if not resumable:
+            self.remove_item(self.resume)
+
+    @ui.button(label="Resume Application", style=discord.ButtonStyle.success)
+    @instrumented("view")
+    async def resume(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not await admit(interaction):
+            return
+        checkpoint = store.get_checkpoint(interaction.user.id)
+        if not checkpoint or checkpoint["guild_id"] != self.guild_id or checkpoint["role_type"] != self.role_type:
+            await interaction.response.send_message("⚠️ There is no saved application to resume. Please start a new one.", ephemeral=True)
+            return
+        if len(checkpoint["answers"]) >= len(self.qlist):
+            # Every question was answered but the submission didn't go through; there is nothing
+            # left to ask, and a modal with no inputs would be rejected by Discord
+            await submit_form(interaction, self.guild_id, self.role_type, checkpoint["answers"])
+        elif QUESTIONNAIRE_MODE == "modal":
+            await interaction.response.send_modal(QuestionPageModal(self.role_type, self.guild_id, self.qlist, checkpoint["answers"]))
+        else:
+            await self.run_questionnaire(interaction, checkpoint["answers"])
+
+    @ui.button(label="Fill in Form", style=discord.ButtonStyle.success)
+    @instrumented("view")
+    async def start_form(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not await admit(interaction):
+            return
+        await interaction.response.send_modal(QuestionPageModal(self.role_type, self.guild_id, self.qlist, []))
 
     @ui.button(label="Start Application", style=discord.ButtonStyle.primary)
+    @instrumented("view")
     async def start(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_message("Let's begin. Please answer the following questions in DM one by one.", ephemeral=True)
-
-        qlist = questions[self.role_type]
-        answers = []
+        if not await admit(interaction):
+            return
+        await self.run_questionnaire(interaction)
 
-        def check(m):
-            return m.author == interaction.user and isinstance(m.channel, discord.DMChannel)
+    async def run_questionnaire(self, interaction: discord.Interaction, answers: list = None):
+        existing = sessions.sessions.get(interaction.user.id)
+        if existing:
+            await interaction.response.send_message(session_in_progress(existing), ephemeral=True)
+            return
+        if sessions.full():
+            metrics.inc("application_admission_rejected_total", reason="queue_full")
+            await interaction.response.send_message(
+                "⏳ Too many applications are in progress right now. Please try again in a few minutes.", ephemeral=True
+            )
+            return
+        session = sessions.begin(interaction.user, self.guild_id, self.role_type, self.qlist, answers)
 
-        for q in qlist:
-            await interaction.user.send(q)
-            try:
-                msg = await bot.wait_for('message', check=check, timeout=300)
-                answers.append((q, msg.content))
-            except asyncio.TimeoutError:
-                await interaction.user.send("⏰ You took too long to answer. Application canceled.")
-                return
+        position = sessions.position(session)
+        if position:
+            await interaction.response.send_message(
+                f"🕒 Lots of people are applying right now. You're #{position} in line; I'll DM you the first question when it's your turn.",
+                ephemeral=True
+            )
+        elif answers:
+            await interaction.response.send_message(f"Welcome back! Continuing from question {len(answers) + 1} in DM.", ephemeral=True)
+        else:
+            await interaction.response.send_message("Let's begin. Please answer the following questions in DM one by one.", ephemeral=True)
 
-        embed = discord.Embed(
-            title=f"{interaction.user} Application for {self.role_type}",
-            color=discord.Color.blue()
-        )
-        for q, a in answers:
-            embed.add_field(name=q, value=a, inline=False)
-        embed.set_footer(text=f"User ID: {interaction.user.id} | Guild ID: {self.guild_id}")
+        try:
+            answers = await sessions.run(session)
+        except discord.Forbidden:
+            await interaction.followup.send("❌ I couldn't DM you. Please enable DMs from server members and try again.", ephemeral=True)
+            return
+        if answers is None:
+            await interaction.user.send(
+                "⏰ You took too long to answer. Your answers so far have been saved; click below to pick up where you left off.",
+                view=StartApplicationView(self.role_type, self.guild_id, self.qlist, resumable=True)
+            )
+            return
 
-        sent = False
-        guild = bot.get_guild(self.guild_id)
-        if guild:
-            channel = discord.utils.get(guild.text_channels, name=LOG_CHANNEL_NAME)
-            if channel:
-                try:
-                    # Send @here ping before the embed
-                    message = await channel.send("@here New application received!")
-                    await channel.send(embed=embed, view=ReviewView(interaction.user, self.role_type, message.id, self.guild_id))
-                    
-                    # Track this pending application
-                    pending_applications[interaction.user.id] = {
-                        "message_id": message.id,
-                        "role_type": self.role_type,
-                        "guild_id": self.guild_id
-                    }
-                    
-                    sent = True
-                except Exception as e:
-                    print(f"Failed to send application embed in channel: {e}")
-
-                for member in guild.members:
-                    if any(role.name == DEV_ROLE_NAME for role in member.roles):
-                        try:
-                            await member.send(f"📨 {interaction.user} just submitted a **{self.role_type}** application.")
-                        except discord.Forbidden:
-                            print(f"❌ Couldn't DM {member}")
-
-        if sent:
-            await interaction.user.send(embed=discord.Embed(
-                title="✅ Application Submitted",
-                description="Your application has been submitted. Thank you!",
-                color=discord.Color.green()
-            ))
+        if await submit_application(interaction.user, self.guild_id, self.role_type, answers):
+            await interaction.user.send(embed=SUBMITTED_EMBED)
         else:
-            await interaction.user.send("⚠️ Could not send your application to the review channel. Please notify staff.")
+            await interaction.user.send(SUBMIT_FAILED_MESSAGE)
 
 @tree.command(name="application", description="Create an application menu")
 @app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
 async def application(interaction: discord.Interaction):
     embed = discord.Embed(
         title="📋 Application System",
@@ -467,65 +2708,172 @@ async def application(interaction: discord.Interaction):
         ),
         color=discord.Color.teal()
     )
+    if not guild_configs.get(interaction.guild.id).select_options():
+        await interaction.response.send_message("ℹ️ All application types are closed. Open one with /application_open first.", ephemeral=True)
+        return
     await interaction.response.send_message(embed=embed, view=ApplicationView(interaction.guild.id))
 
+async def role_type_autocomplete(interaction: discord.Interaction, current: str) -> list:
+    # Served from the cached guild config, so typing doesn't hit storage
+    current = current.lower()
+    return [
+        app_commands.Choice(name=name, value=name)
+        for name in guild_configs.get(interaction.guild_id).roles if current in name.lower()
+    ][:25]
+
 @tree.command(name="application_open", description="Open applications for a specific role")
 @app_commands.describe(role_type="Which application type to open")
-@app_commands.choices(role_type=[
-    app_commands.Choice(name="Staff", value="Staff"),
-    app_commands.Choice(name="Media", value="Media"),
-    app_commands.Choice(name="Developer", value="Developer")
-])
+@app_commands.autocomplete(role_type=role_type_autocomplete)
 @app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
 async def application_open(interaction: discord.Interaction, role_type: str):
-    if role_type not in application_status:
+    config = guild_configs.get(interaction.guild.id)
+    if role_type not in config.roles:
         await interaction.response.send_message("❌ Invalid role type.", ephemeral=True)
         return
 
-    if application_status[role_type]:
+    if role_type not in config.closed:
         await interaction.response.send_message(f"ℹ️ {role_type} applications are already open.", ephemeral=True)
     else:
-        application_status[role_type] = True
+        guild_configs.save_closed(interaction.guild.id, config.closed - {role_type})
         await interaction.response.send_message(f"✅ {role_type} applications are now open!", ephemeral=False)
 
 @tree.command(name="application_close", description="Close applications for a specific role")
 @app_commands.describe(role_type="Which application type to close")
-@app_commands.choices(role_type=[
-    app_commands.Choice(name="Staff", value="Staff"),
-    app_commands.Choice(name="Media", value="Media"),
-    app_commands.Choice(name="Developer", value="Developer")
-])
+@app_commands.autocomplete(role_type=role_type_autocomplete)
 @app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
 async def application_close(interaction: discord.Interaction, role_type: str):
-    if role_type not in application_status:
+    config = guild_configs.get(interaction.guild.id)
+    if role_type not in config.roles:
         await interaction.response.send_message("❌ Invalid role type.", ephemeral=True)
         return
 
-    if not application_status[role_type]:
+    if role_type in config.closed:
         await interaction.response.send_message(f"ℹ️ {role_type} applications are already closed.", ephemeral=True)
     else:
-        application_status[role_type] = False
+        guild_configs.save_closed(interaction.guild.id, config.closed | {role_type})
         await interaction.response.send_message(f"⛔ {role_type} applications are now closed!", ephemeral=False)
 
+class RoleQuestionsModal(ui.Modal):
+    # Edits one role type's questions, one per line
+    def __init__(self, role: RoleConfig):
+        super().__init__(title=f"{role.name} Questions"[:45])
+        self.role = role
+        self.questions_input = ui.TextInput(
+            label=f"Questions, one per line (up to {MAX_QUESTIONS})",
+            style=discord.TextStyle.paragraph,
+            default="\n".join(role.questions)[:4000] or None,
+            max_length=4000
+        )
+        self.add_item(self.questions_input)
+
+    @instrumented("view")
+    async def on_submit(self, interaction: discord.Interaction):
+        qlist = tuple(line.strip()[:256] for line in self.questions_input.value.splitlines() if line.strip())
+        if not qlist or len(qlist) > MAX_QUESTIONS:
+            await interaction.response.send_message(f"❌ Enter between 1 and {MAX_QUESTIONS} questions.", ephemeral=True)
+            return
+        if answer_limit(qlist) < MIN_ANSWER_LENGTH:
+            spare = SUBMISSION_TEXT_BUDGET - MIN_ANSWER_LENGTH * len(qlist)
+            await interaction.response.send_message(
+                f"❌ Those questions are too long to fit in one application. With {len(qlist)} questions they can use "
+                f"{max(spare, 0)} characters in total; yours use {sum(len(q) for q in qlist)}.",
+                ephemeral=True
+            )
+            return
+        # Re-read the config so edits to other roles made while the modal was open are kept
+        roles = dict(guild_configs.get(interaction.guild.id).roles)
+        if self.role.name not in roles and len(roles) >= MAX_ROLE_TYPES:
+            await interaction.response.send_message(f"❌ A server can have at most {MAX_ROLE_TYPES} application types.", ephemeral=True)
+            return
+        roles[self.role.name] = RoleConfig(self.role.name, self.role.description, self.role.emoji, qlist)
+        guild_configs.save_roles(interaction.guild.id, roles)
+        await interaction.response.send_message(f"✅ Saved {len(qlist)} questions for {self.role.name} applications.", ephemeral=True)
+
+def parse_emoji(text: str):
+    # A unicode emoji or a custom one written as <:name:id>, normalized; None for anything Discord
+    # would reject in a select option
+    text = text.strip()
+    emoji = discord.PartialEmoji.from_str(text)
+    if emoji.id is not None:
+        return str(emoji)
+    if text.startswith("<") or any(c.isspace() or (c.isascii() and c.isalpha()) for c in text):
+        return None
+    if not any(unicodedata.category(c) == "So" or c == "\u20e3" for c in text):
+        return None
+    return text
+
+@tree.command(name="application_role_set", description="Add an application type or edit its questions")
+@app_commands.describe(
+    role_type="Application type to add or edit",
+    description="Shown under the role in the application menu",
+    emoji="Shown next to the role in the application menu"
+)
+@app_commands.autocomplete(role_type=role_type_autocomplete)
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_role_set(
+    interaction: discord.Interaction,
+    role_type: app_commands.Range[str, 1, 100],
+    description: app_commands.Range[str, 0, 100] = None,
+    emoji: app_commands.Range[str, 1, 64] = None
+):
+    if emoji is not None and parse_emoji(emoji) is None:
+        await interaction.response.send_message("❌ The emoji must be a single emoji, or a custom one like `<:name:id>`.", ephemeral=True)
+        return
+    current = guild_configs.get(interaction.guild.id).role(role_type)
+    role = RoleConfig(
+        role_type,
+        description if description is not None else (current.description if current else f"Apply for {role_type} role"),
+        parse_emoji(emoji) if emoji is not None else (current.emoji if current else ""),
+        current.questions if current else ()
+    )
+    await interaction.response.send_modal(RoleQuestionsModal(role))
+
+@tree.command(name="application_role_remove", description="Remove an application type from this server")
+@app_commands.describe(role_type="Application type to remove")
+@app_commands.autocomplete(role_type=role_type_autocomplete)
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_role_remove(interaction: discord.Interaction, role_type: str):
+    config = guild_configs.get(interaction.guild.id)
+    if role_type not in config.roles:
+        await interaction.response.send_message("❌ Invalid role type.", ephemeral=True)
+        return
+    roles = {name: role for name, role in config.roles.items() if name != role_type}
+    guild_configs.save_roles(interaction.guild.id, roles)
+    if role_type in config.closed:
+        guild_configs.save_closed(interaction.guild.id, config.closed - {role_type})
+    await interaction.response.send_message(f"🗑️ Removed {role_type} applications. Pending {role_type} applications can still be reviewed.", ephemeral=True)
+
+def ban_details(info: BanRecord) -> str:
+    details = f"Reason: {info.reason}\nBanned on: {format_epoch(info.date)}"
+    if info.expires:
+        details += f"\nExpires: {format_epoch(info.expires)}"
+    return details
+
 @tree.command(name="applicationban", description="Ban a user from applying")
 @app_commands.describe(
     user="User to ban",
     reason="Reason for ban",
-    global_ban="Whether to ban globally (default: server only)"
+    global_ban="Whether to ban globally (default: server only)",
+    hours="Lift the ban automatically after this many hours (default: permanent)"
 )
 @app_commands.checks.has_role(DEV_ROLE_NAME)
-async def applicationban(interaction: discord.Interaction, user: discord.User, reason: str, global_ban: bool = False):
-    ban_info = {"reason": reason, "date": datetime.utcnow()}
+@instrumented("command")
+async def applicationban(interaction: discord.Interaction, user: discord.User, reason: str, global_ban: bool = False,
+                         hours: app_commands.Range[int, 1, 87600] = None):
+    now = epoch_now()
+    ban_info = BanRecord(reason, now, user.name, now + hours * 3600 if hours else 0)
+    expiry = f"\nExpires: {format_epoch(ban_info.expires)}" if hours else ""
     
     if global_ban:
-        global_banned[user.id] = ban_info
-        await interaction.response.send_message(f"🔨 {user} has been globally banned from applying.\nReason: {reason}", ephemeral=False)
+        store.add_ban(GLOBAL_SCOPE, user.id, ban_info)
+        await interaction.response.send_message(f"🔨 {user} has been globally banned from applying.\nReason: {reason}{expiry}", ephemeral=False)
     else:
-        guild_id = interaction.guild.id
-        if guild_id not in server_data:
-            server_data[guild_id] = {'declined': {}, 'banned': {}, 'history': {}}
-        server_data[guild_id]['banned'][user.id] = ban_info
-        await interaction.response.send_message(f"🔨 {user} has been banned from applying in this server.\nReason: {reason}", ephemeral=False)
+        store.add_ban(interaction.guild.id, user.id, ban_info)
+        await interaction.response.send_message(f"🔨 {user} has been banned from applying in this server.\nReason: {reason}{expiry}", ephemeral=False)
 
 @tree.command(name="applicationunban", description="Unban a user from applying")
 @app_commands.describe(
@@ -533,51 +2881,157 @@ async def applicationban(interaction: discord.Interaction, user: discord.User, r
     global_unban="Whether to unban globally (default: server only)"
 )
 @app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
 async def applicationunban(interaction: discord.Interaction, user: discord.User, global_unban: bool = False):
     if global_unban:
-        if user.id in global_banned:
-            global_banned.pop(user.id)
+        if store.remove_ban(GLOBAL_SCOPE, user.id):
             await interaction.response.send_message(f"✅ {user} has been globally unbanned and can now apply.", ephemeral=False)
         else:
             await interaction.response.send_message(f"❌ {user} is not globally banned.", ephemeral=True)
     else:
-        guild_id = interaction.guild.id
-        if guild_id in server_data and user.id in server_data[guild_id]['banned']:
-            server_data[guild_id]['banned'].pop(user.id)
+        if store.remove_ban(interaction.guild.id, user.id):
             await interaction.response.send_message(f"✅ {user} has been unbanned in this server and can now apply here.", ephemeral=False)
         else:
             await interaction.response.send_message(f"❌ {user} is not banned in this server.", ephemeral=True)
 
+class PagedView(ui.View):
+    # Previous/Next paging over `total` items; subclasses fill in the embed for self.page in
+    # render_page, and `noun` names the items in the footer
+    noun = "entries"
+
+    def __init__(self, total: int, page_size: int):
+        super().__init__(timeout=300)
+        self.total = total
+        self.page = 0
+        self.pages = -(-total // page_size)
+        if self.pages <= 1:
+            self.clear_items()
+
+    async def render_page(self) -> discord.Embed:
+        raise NotImplementedError
+
+    async def render(self) -> discord.Embed:
+        embed = await self.render_page()
+        embed.set_footer(text=f"Page {self.page + 1} of {self.pages} | {self.total} total {self.noun}")
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+        return embed
+
+    @ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    @instrumented("view")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    @instrumented("view")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.pages - 1, self.page + 1)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+class BanListView(PagedView):
+    # Pages through a ban list, reading and resolving users only for the entries on the visible page
+    noun = "bans"
+
+    def __init__(self, scope_id: int, title: str, total: int, name: str = None, user_id: int = None):
+        super().__init__(total, BAN_PAGE_SIZE)
+        self.scope_id = scope_id
+        self.title = title
+        self.name = name        # username prefix, lowercase
+        self.user_id = user_id  # exact ID lookup; takes precedence over name
+        self.usernames = {}  # user_id: name, for bans stored without one
+
+    def entries(self) -> list:
+        if self.user_id is not None:
+            ban = store.get_ban(self.scope_id, self.user_id)
+            return [(self.user_id, ban)] if ban else []
+        return store.ban_page(self.scope_id, self.name, self.page * BAN_PAGE_SIZE, BAN_PAGE_SIZE)
+
+    async def username(self, user_id: int, info: BanRecord) -> str:
+        if info.username:
+            return info.username
+        if user_id not in self.usernames:
+            user = bot.get_user(user_id)
+            if user is None:
+                try:
+                    user = await bot.fetch_user(user_id)
+                except discord.HTTPException:
+                    pass
+            self.usernames[user_id] = user.name if user else f"User ID {user_id}"
+        return self.usernames[user_id]
+
+    async def render_page(self) -> discord.Embed:
+        embed = discord.Embed(title=self.title, color=discord.Color.red())
+        entries = self.entries()
+        names = await asyncio.gather(*(self.username(user_id, info) for user_id, info in entries))
+        for (user_id, info), name in zip(entries, names):
+            # Keep ten fields well inside the 6000 character embed limit
+            if len(info.reason) > 400:
+                info = BanRecord(info.reason[:397] + "...", info.date, info.username, info.expires)
+            embed.add_field(name=f"{name} ({user_id})", value=ban_details(info), inline=False)
+        return embed
+
 @tree.command(name="applicationbans", description="List all users banned from applying")
-@app_commands.describe(show_global="Whether to show global bans (default: server only)")
+@app_commands.describe(
+    show_global="Whether to show global bans (default: server only)",
+    search="Username prefix or user ID to look for"
+)
 @app_commands.checks.has_role(DEV_ROLE_NAME)
-async def applicationbans(interaction: discord.Interaction, show_global: bool = False):
-    guild_id = interaction.guild.id
-    
-    if not show_global and (guild_id not in server_data or not server_data[guild_id]['banned']):
-        await interaction.response.send_message("There are no server-specific banned users.", ephemeral=True)
-        return
-    elif show_global and not global_banned:
-        await interaction.response.send_message("There are no globally banned users.", ephemeral=True)
+@instrumented("command")
+async def applicationbans(interaction: discord.Interaction, show_global: bool = False, search: str = None):
+    scope_id = GLOBAL_SCOPE if show_global else interaction.guild.id
+    title = "Global Ban List" if show_global else "Server Ban List"
+    name = user_id = None
+    if search:
+        match = re.fullmatch(r"<@!?(\d{15,20})>|(\d{15,20})", search.strip())
+        if match:
+            user_id = int(match.group(1) or match.group(2))
+        else:
+            name = search.strip().lstrip("@").lower()
+        title += f" matching \"{search.strip()}\""
+
+    if user_id is not None:
+        total = 1 if store.get_ban(scope_id, user_id) else 0
+    else:
+        total = store.count_bans(scope_id, name)
+    if not total:
+        if search:
+            await interaction.response.send_message(f"No banned users match \"{search.strip()}\".", ephemeral=True)
+        elif show_global:
+            await interaction.response.send_message("There are no globally banned users.", ephemeral=True)
+        else:
+            await interaction.response.send_message("There are no server-specific banned users.", ephemeral=True)
         return
 
-    embed = discord.Embed(
-        title="Global Ban List" if show_global else "Server Ban List",
-        color=discord.Color.red()
-    )
-    
-    ban_data = global_banned if show_global else server_data.get(guild_id, {}).get('banned', {})
-    
-    for user_id, info in ban_data.items():
-        user = bot.get_user(user_id)
-        username = user.name if user else f"User ID {user_id}"
-        embed.add_field(
-            name=username,
-            value=f"Reason: {info['reason']}\nBanned on: {info['date'].strftime('%Y-%m-%d %H:%M UTC')}",
-            inline=False
+    view = BanListView(scope_id, title, total, name, user_id)
+    await interaction.response.send_message(embed=await view.render(), view=view, ephemeral=True)
+
+class HistoryView(PagedView):
+    # Pages through a user's history, fetching only the entries on the visible page
+    def __init__(self, user: discord.abc.User, guild_id: int, total: int):
+        super().__init__(total, HISTORY_PAGE_SIZE)
+        self.user = user
+        self.guild_id = guild_id  # None for global history
+
+    async def render_page(self) -> discord.Embed:
+        history_source = "Global" if self.guild_id is None else "Server"
+        embed = discord.Embed(
+            title=f"{history_source} Application History for {self.user}",
+            color=discord.Color.blue()
         )
-    
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+        entries = store.history_page(self.user.id, self.guild_id, self.page * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE)
+        for guild_id, entry in entries:
+            status = "✅ Accepted" if entry.action is Action.ACCEPTED else "❌ Declined"
+            name = f"{entry.role} - {format_epoch(entry.date, '%Y-%m-%d %H:%M')}"
+            if self.guild_id is None:
+                guild = bot.get_guild(guild_id)
+                name += f" ({guild.name if guild else guild_id})"
+            embed.add_field(
+                name=name,
+                value=f"{status} by {entry.moderator}" + (f"\nReason: {entry.reason}" if entry.reason else ""),
+                inline=False
+            )
+        return embed
 
 @tree.command(name="applicationhistory", description="View a user's application history")
 @app_commands.describe(
@@ -585,53 +3039,344 @@ async def applicationbans(interaction: discord.Interaction, show_global: bool =
     show_global="Whether to show global history (default: server only)"
 )
 @app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
 async def application_history_command(interaction: discord.Interaction, user: discord.User, show_global: bool = False):
-    guild_id = interaction.guild.id
-    
-    # Initialize server data if not exists
-    if guild_id not in server_data:
-        server_data[guild_id] = {'declined': {}, 'banned': {}, 'history': {}}
-    
-    # Get the appropriate history
-    if show_global:
-        # Combine all server histories for this user
-        all_history = []
-        for gid, data in server_data.items():
-            if user.id in data.get('history', {}):
-                all_history.extend(data['history'][user.id])
-        
-        if not all_history:
+    guild_id = None if show_global else interaction.guild.id
+    total = store.count_history(user.id, guild_id)
+    if not total:
+        if show_global:
             await interaction.response.send_message(f"ℹ️ No global application history found for {user.mention}.", ephemeral=True)
-            return
-        
-        history_source = "Global"
-        history_entries = sorted(all_history, key=lambda x: x['date'], reverse=True)
-    else:
-        if user.id not in server_data[guild_id]['history'] or not server_data[guild_id]['history'][user.id]:
+        else:
             await interaction.response.send_message(f"ℹ️ No server-specific application history found for {user.mention}.", ephemeral=True)
+        return
+
+    view = HistoryView(user, guild_id, total)
+    await interaction.response.send_message(embed=await view.render(), view=view, ephemeral=True)
+
+@tree.command(name="application_cooldown", description="Set how long declined applicants must wait before reapplying here")
+@app_commands.describe(hours="Cooldown in hours after a decline in this server")
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_cooldown(interaction: discord.Interaction, hours: app_commands.Range[int, 0, 8760]):
+    store.set_setting(interaction.guild.id, "decline_cooldown_hours", hours)
+    guild_configs.invalidate(interaction.guild.id)
+    await interaction.response.send_message(f"✅ Declined applicants can reapply in this server after {hours} hours.", ephemeral=True)
+
+@tree.command(name="application_logchannel", description="Set the channel application logs are posted to")
+@app_commands.describe(channel=f"Log channel (leave empty to use #{LOG_CHANNEL_NAME})")
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_logchannel(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    store.set_setting(interaction.guild.id, "log_channel_id", channel.id if channel else None)
+    guild_configs.invalidate(interaction.guild.id)
+    log_channels.invalidate(interaction.guild.id)
+    if channel:
+        await interaction.response.send_message(f"✅ Application logs will be posted in {channel.mention}.", ephemeral=True)
+    else:
+        await interaction.response.send_message(f"✅ Application logs will be posted in #{LOG_CHANNEL_NAME}.", ephemeral=True)
+
+EXPORT_FIELDS = ["guild_id", "user_id", "action", "role", "submitted", "decided", "seconds_to_decision", "moderator_id", "moderator", "reason"]
+
+def export_rows(guild_id: int = None):
+    # One dict per decision, straight off the store's history iterator
+    for gid, user_id, entry in store.iter_history(guild_id):
+        yield {
+            "guild_id": gid,
+            "user_id": user_id,
+            "action": entry.action.value,
+            "role": entry.role,
+            "submitted": format_epoch(entry.submitted, "%Y-%m-%dT%H:%M:%SZ") if entry.submitted else None,
+            "decided": format_epoch(entry.date, "%Y-%m-%dT%H:%M:%SZ"),
+            "seconds_to_decision": entry.date - entry.submitted if entry.submitted else None,
+            "moderator_id": entry.moderator_id or None,
+            "moderator": entry.legacy_moderator,
+            "reason": entry.reason,
+        }
+
+async def write_export(fp, fmt: str, guild_id: int = None) -> int:
+    # Streams rows into fp, yielding to the event loop every few hundred rows; returns the row count
+    text = io.TextIOWrapper(fp, encoding="utf-8", newline="")
+    writer = csv.DictWriter(text, EXPORT_FIELDS) if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+    count = 0
+    for count, row in enumerate(export_rows(guild_id), 1):
+        if writer:
+            writer.writerow(row)
+        else:
+            text.write(json.dumps(row) + "\n")
+        if count % 500 == 0:
+            await asyncio.sleep(0)
+    text.flush()
+    text.detach()
+    return count
+
+# The Dev role is per server, so data from every server is for the bot's owner (or owning team) only
+ALL_GUILDS_DENIED_MESSAGE = "❌ Only the bot owner can see data from every server."
+
+@tree.command(name="application_export", description="Download application history as a file")
+@app_commands.describe(
+    format="File format (default: jsonl)",
+    all_guilds="Export every server's history instead of only this one (bot owner only)",
+    compress="Gzip the file, for histories too large to upload otherwise"
+)
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_export(interaction: discord.Interaction, format: Literal["jsonl", "csv"] = "jsonl", all_guilds: bool = False, compress: bool = False):
+    if all_guilds and not await bot.is_owner(interaction.user):
+        await interaction.response.send_message(ALL_GUILDS_DENIED_MESSAGE, ephemeral=True)
+        return
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    guild_id = None if all_guilds else interaction.guild.id
+    filename = f"applications-{'all' if all_guilds else guild_id}.{format}" + (".gz" if compress else "")
+    with tempfile.TemporaryFile() as fp:
+        if compress:
+            with gzip.GzipFile(fileobj=fp, mode="wb") as gz:
+                count = await write_export(gz, format, guild_id)
+        else:
+            count = await write_export(fp, format, guild_id)
+        size = fp.tell()
+        if not count:
+            await interaction.followup.send("ℹ️ There is no application history to export yet.", ephemeral=True)
             return
-        
-        history_source = "Server"
-        history_entries = sorted(server_data[guild_id]['history'][user.id], key=lambda x: x['date'], reverse=True)
-    
+        if size > interaction.guild.filesize_limit:
+            hint = "" if compress else " Try again with `compress` enabled."
+            await interaction.followup.send(f"❌ The export is {size / 1024 / 1024:.1f} MB, too large to upload here.{hint}", ephemeral=True)
+            return
+        fp.seek(0)
+        await interaction.followup.send(
+            f"📦 Exported {count} decisions.", file=discord.File(fp, filename=filename), ephemeral=True
+        )
+
+def format_duration(seconds: float) -> str:
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
+
+def format_rate(accepted: int, declined: int) -> str:
+    total = accepted + declined
+    return f"{accepted} ✅ / {declined} ❌ ({accepted / total:.0%} accepted)" if total else "no decisions"
+
+@tree.command(name="application_stats", description="Acceptance rates, decision times and moderator activity")
+@app_commands.describe(all_guilds="Show totals across every server instead of only this one (bot owner only)")
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_stats(interaction: discord.Interaction, all_guilds: bool = False):
+    if all_guilds and not await bot.is_owner(interaction.user):
+        await interaction.response.send_message(ALL_GUILDS_DENIED_MESSAGE, ephemeral=True)
+        return
+    guild_stats = stats.get(GLOBAL_SCOPE if all_guilds else interaction.guild.id)
+    if guild_stats is None:
+        await interaction.response.send_message("ℹ️ No applications have been decided yet.", ephemeral=True)
+        return
+
     embed = discord.Embed(
-        title=f"{history_source} Application History for {user}",
+        title="Application Stats (all servers)" if all_guilds else "Application Stats",
         color=discord.Color.blue()
     )
-    
-    for entry in history_entries[:25]:  # Limit to 25 entries to avoid embed limits
-        status = "✅ Accepted" if entry["action"] == "accepted" else "❌ Declined"
-        embed.add_field(
-            name=f"{entry['role']} - {entry['date'].strftime('%Y-%m-%d %H:%M')}",
-            value=f"{status} by {entry['moderator']}" + (f"\nReason: {entry['reason']}" if entry.get("reason") else ""),
-            inline=False
+    accepted = sum(n for (_, action), n in guild_stats.outcomes.items() if action is Action.ACCEPTED)
+    declined = sum(n for (_, action), n in guild_stats.outcomes.items() if action is Action.DECLINED)
+    embed.add_field(name="All time", value=format_rate(accepted, declined), inline=False)
+    embed.add_field(name="Last 24 hours", value=format_rate(*stats.window(guild_stats, 24)), inline=True)
+    embed.add_field(name="Last 7 days", value=format_rate(*stats.window(guild_stats, STATS_WINDOW_HOURS)), inline=True)
+
+    lines = []
+    for role in sorted({role for role, _ in guild_stats.outcomes}):
+        line = f"**{role}**: " + format_rate(
+            guild_stats.outcomes.get((role, Action.ACCEPTED), 0), guild_stats.outcomes.get((role, Action.DECLINED), 0)
         )
-    
-    if len(history_entries) > 25:
-        embed.set_footer(text=f"Showing 25 of {len(history_entries)} total entries")
-    
+        total_seconds, timed = guild_stats.decision_time.get(role, (0, 0))
+        if timed:
+            line += f", avg {format_duration(total_seconds / timed)} to decide"
+        lines.append(line)
+    embed.add_field(name="By role", value="\n".join(lines)[:1024], inline=False)
+
+    busiest = sorted(guild_stats.moderators.items(), key=lambda item: sum(item[1]), reverse=True)[:10]
+    embed.add_field(
+        name="Top moderators",
+        value="\n".join(f"{moderator}: {a + d} ({a} ✅ / {d} ❌)" for moderator, (a, d) in busiest)[:1024],
+        inline=False
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@tree.command(name="application_queue", description="Pending applications in this server, oldest first")
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_queue(interaction: discord.Interaction):
+    guild_id = interaction.guild.id
+    summary = store.pending_summary(guild_id)
+    if not summary:
+        await interaction.response.send_message("ℹ️ There are no pending applications.", ephemeral=True)
+        return
+
+    now = epoch_now()
+    total = sum(count for count, _ in summary.values())
+    oldest = min(oldest for _, oldest in summary.values())
+    embed = discord.Embed(
+        title="Application Queue",
+        description=f"**{total}** pending, oldest waiting {format_duration(now - submitted_at(oldest))}",
+        color=discord.Color.blue()
+    )
+    if PENDING_REMINDER_HOURS:
+        cutoff = datetime.fromtimestamp(now - PENDING_REMINDER_HOURS * 3600, timezone.utc)
+        overdue = store.count_pending(guild_id, discord.utils.time_snowflake(cutoff, high=True))
+        if overdue:
+            embed.description += f"\n⏰ {overdue} waiting over {format_hours(timedelta(hours=PENDING_REMINDER_HOURS))} hours"
+    embed.add_field(
+        name="By role",
+        value="\n".join(
+            f"**{role}**: {count} pending, oldest {format_duration(now - submitted_at(oldest))}"
+            for role, (count, oldest) in sorted(summary.items())
+        )[:1024],
+        inline=False
+    )
+    lines = []
+    for user_id, info in store.pending_for_guild(guild_id, limit=10):
+        # Role names can be 100 characters; shortened, ten lines stay inside the 1024 character field
+        role = info.role_type if len(info.role_type) <= 40 else info.role_type[:39] + "…"
+        lines.append(f"<@{user_id}> - {role} - {format_duration(now - submitted_at(info.submission_id))}")
+    embed.add_field(name="Oldest", value="\n".join(lines), inline=False)
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
+async def bulk_review(interaction: discord.Interaction, guild_id: int, targets: list, action: Action, reason: str = None):
+    # All decisions are recorded in one store transaction; applicant DMs and log posts then go
+    # through the outbound queue, whose workers bound the parallelism. The summary message is
+    # edited as the DMs complete.
+    verb = "accepted" if action is Action.ACCEPTED else "declined"
+    still_pending = {info.submission_id for _, info in store.pending_for_guild(guild_id)}
+    decline_cooldown(guild_id)  # load the guild config before the transaction starts
+    decided = []
+    with store.batch():
+        for user_id, pending in targets:
+            if pending.submission_id not in still_pending:
+                continue  # decided by someone else since the command was run
+            log_decision(guild_id, user_id, pending.submission_id, pending.role_type, interaction.user, action, reason, hold_log=True)
+            decided.append((user_id, pending.role_type))
+    log_batcher.flush(guild_id)
+
+    progress = {"sent": 0, "failed": 0}
+    def done(error):
+        progress["failed" if error else "sent"] += 1
+    for user_id, role_type in decided:
+        notify_applicant(guild_id, user_id, decision_embed(guild_id, role_type, action, reason), on_done=done)
+
+    skipped = len(targets) - len(decided)
+    summary = f"{'✅' if action is Action.ACCEPTED else '❌'} {len(decided)} applications {verb}"
+    if skipped:
+        summary += f", {skipped} skipped (already processed)"
+    deadline = time.monotonic() + 14 * 60  # interaction tokens expire after 15 minutes
+    while progress["sent"] + progress["failed"] < len(decided) and time.monotonic() < deadline:
+        await interaction.edit_original_response(content=f"{summary}.\n📨 Notifying applicants: {progress['sent'] + progress['failed']}/{len(decided)}")
+        await asyncio.sleep(2)
+    failed = f", {progress['failed']} could not be reached" if progress["failed"] else ""
+    await interaction.edit_original_response(content=f"{summary}.\n📨 Applicants notified: {progress['sent']}/{len(decided)}{failed}.")
+
+class BulkReviewView(ui.View):
+    # Confirmation step, so a broad filter can't decide hundreds of applications by accident
+    def __init__(self, moderator: discord.abc.User, guild_id: int, targets: list, action: Action, reason: str = None):
+        super().__init__(timeout=120)
+        self.moderator = moderator
+        self.guild_id = guild_id
+        self.targets = targets
+        self.action = action
+        self.reason = reason
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.moderator.id
+
+    @ui.button(label="Confirm", style=discord.ButtonStyle.danger)
+    @instrumented("view")
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        await interaction.response.edit_message(content=f"⏳ Processing {len(self.targets)} applications...", view=None)
+        await bulk_review(interaction, self.guild_id, self.targets, self.action, self.reason)
+
+    @ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    @instrumented("view")
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        await interaction.response.edit_message(content="Cancelled, no applications were changed.", view=None)
+
+@tree.command(name="application_bulk", description="Accept or decline many pending applications at once")
+@app_commands.describe(
+    action="What to do with every matching application",
+    role_type="Only applications for this role",
+    older_than_hours="Only applications submitted at least this many hours ago",
+    users="Only these applicants (mentions or user IDs)",
+    reason="Reason sent to every applicant"
+)
+@app_commands.autocomplete(role_type=role_type_autocomplete)
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def application_bulk(
+    interaction: discord.Interaction,
+    action: Literal["accept", "decline"],
+    role_type: str = None,
+    older_than_hours: app_commands.Range[int, 0, 8760] = None,
+    users: str = None,
+    reason: app_commands.Range[str, 1, 300] = None
+):
+    user_ids = {int(user_id) for user_id in re.findall(r"\d{15,20}", users)} if users else None
+    cutoff = epoch_now() - older_than_hours * 3600 if older_than_hours is not None else None
+    targets = [
+        (user_id, pending) for user_id, pending in store.pending_for_guild(interaction.guild.id)
+        if (role_type is None or pending.role_type == role_type)
+        and (user_ids is None or user_id in user_ids)
+        and (cutoff is None or submitted_at(pending.submission_id) <= cutoff)
+    ]
+    if not targets:
+        await interaction.response.send_message("ℹ️ No pending applications match those filters.", ephemeral=True)
+        return
+
+    decision = Action.ACCEPTED if action == "accept" else Action.DECLINED
+    view = BulkReviewView(interaction.user, interaction.guild.id, targets, decision, reason)
+    await interaction.response.send_message(
+        f"⚠️ {len(targets)} pending application(s) will be **{decision.value}**" + (f" with reason: {reason}" if reason else "") + ". Continue?",
+        view=view,
+        ephemeral=True
+    )
+
+@tree.command(name="debug_profile", description="Profile the bot for a while and report where the time goes")
+@app_commands.describe(
+    seconds="How long to profile",
+    format="collapsed: sampled stacks for flamegraphs; pstats: cProfile output",
+    slow_ms="Log event loop callbacks that block for longer than this"
+)
+@app_commands.checks.has_role(DEV_ROLE_NAME)
+@instrumented("command")
+async def debug_profile(
+    interaction: discord.Interaction,
+    seconds: app_commands.Range[int, 1, PROFILE_MAX_SECONDS] = 30,
+    format: Literal["collapsed", "pstats"] = "collapsed",
+    slow_ms: app_commands.Range[int, 1, 10000] = 100
+):
+    if profiler.running:
+        await interaction.response.send_message("⚠️ A profile is already running.", ephemeral=True)
+        return
+    await interaction.response.send_message(f"🔬 Profiling for {seconds}s...", ephemeral=True)
+    try:
+        result = await profiler.run(seconds, format, slow_ms)
+    except RuntimeError:
+        # The admin HTTP route started one in the meantime
+        await interaction.followup.send("⚠️ A profile is already running.", ephemeral=True)
+        return
+
+    count = f"{result['samples']} samples" if format == "collapsed" else f"{result['calls']} calls"
+    lines = [f"🔬 Profile written to `{result['path']}` ({count}, {result['slow_callbacks']} slow callbacks)."]
+    if result["top"]:
+        lines.append("Top:\n" + "\n".join(f"`{entry}`" for entry in result["top"]))
+    lines.append("Tasks: " + ", ".join(f"{name} x{n}" for name, n in result["tasks"]))
+    content = "\n".join(lines)[:2000]
+    if os.path.getsize(result["path"]) <= (interaction.guild.filesize_limit if interaction.guild else 10 * 1024 * 1024):
+        await interaction.followup.send(content, file=discord.File(result["path"]), ephemeral=True)
+    else:
+        await interaction.followup.send(content, ephemeral=True)
+
 @application.error
 async def application_error(interaction: discord.Interaction, error):
     if isinstance(error, app_commands.MissingRole):
@@ -639,13 +3384,186 @@ async def application_error(interaction: discord.Interaction, error):
     else:
         await interaction.response.send_message(f"❌ An error occurred: {error}", ephemeral=True)
 
+@bot.listen()
+async def on_message(message: discord.Message):
+    # Single dispatcher for questionnaire answers
+    if message.guild is None and not message.author.bot:
+        await sessions.handle(message)
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.roles != after.roles:
+        reviewers.update(after)
+
+@bot.event
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    reviewers.remove(payload.guild_id, payload.user.id)
+
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    # A guild indexed before its Dev role existed has no role id to match member updates against
+    if role.name == DEV_ROLE_NAME:
+        reviewers.invalidate(role.guild.id)
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    # Covers a role renamed to or from DEV_ROLE_NAME as well
+    if DEV_ROLE_NAME in (before.name, after.name):
+        reviewers.invalidate(after.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    if role.name == DEV_ROLE_NAME:
+        reviewers.invalidate(role.guild.id)
+
+@bot.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    log_channels.invalidate(channel.guild.id)
+
+@bot.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    log_channels.invalidate(after.guild.id)
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    log_channels.invalidate(channel.guild.id)
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    guild_configs.invalidate(guild.id)
+    log_channels.invalidate(guild.id)
+    reviewers.invalidate(guild.id)
+
+class CommandSyncer:
+    # Global command sync is slow and heavily rate limited, so it only runs when the tree's
+    # fingerprint differs from the one recorded for the last successful sync
+    def __init__(self, path: str):
+        self.path = path
+        self.synced = False
+
+    def fingerprint(self) -> str:
+        # Hash the payload Discord would receive: names, options, choices and default permissions
+        payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda c: (c["type"], c["name"]))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, fingerprints: dict):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(fingerprints, f, indent=2)
+        os.replace(tmp, self.path)
+
+    async def sync(self):
+        # on_ready fires again after every reconnect; the tree only needs syncing once per process
+        if self.synced:
+            return
+        self.synced = True
+        if SHARD_IDS is not None and 0 not in SHARD_IDS:
+            return  # the worker running shard 0 syncs for everyone
+        fingerprint = self.fingerprint()
+        fingerprints = self.load()
+        scopes = [None]
+        if DEV_GUILD_ID:
+            tree.copy_global_to(guild=discord.Object(id=DEV_GUILD_ID))
+            scopes.append(DEV_GUILD_ID)
+        for guild_id in scopes:
+            # Keyed by application so several bots can share one cache file
+            key = f"{bot.application_id}:{guild_id or 'global'}"
+            if fingerprints.get(key) == fingerprint:
+                print(f"Commands unchanged for {guild_id or 'global'} scope, skipping sync.")
+                continue
+            try:
+                synced = await tree.sync(guild=discord.Object(id=guild_id) if guild_id else None)
+            except Exception as e:
+                print(f"Failed to sync commands for {guild_id or 'global'} scope: {e}")
+                self.synced = False  # try again on the next on_ready
+                continue
+            print(f"Synced {len(synced)} commands for {guild_id or 'global'} scope.")
+            fingerprints[key] = fingerprint
+            try:
+                self.save(fingerprints)
+            except OSError as e:
+                print(f"Could not save command fingerprints: {e}")
+
+command_syncer = CommandSyncer(COMMAND_SYNC_CACHE)
+
 @bot.event
 async def on_ready():
     print(f"Logged in as {bot.user}!")
+    await command_syncer.sync()
+
+async def recommended_shard_count() -> int:
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
     try:
-        synced = await tree.sync()
-        print(f"Synced {len(synced)} commands.")
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
+        await http.static_login(TOKEN)
+        shards, _, _ = await http.get_bot_gateway()
+        return shards
+    finally:
+        await http.close()
 
-bot.run(TOKEN)
+def run_shard_workers():
+    # Splits the shards into contiguous ranges, runs one worker process per range and restarts
+    # workers that die. Starts are staggered because each shard's identify is rate limited.
+    if STORAGE_BACKEND != "sqlite":
+        raise SystemExit("SHARD_MODE=processes needs STORAGE_BACKEND=sqlite so workers share state")
+    shard_count = SHARD_COUNT or asyncio.run(recommended_shard_count())
+    count = max(1, min(SHARD_PROCESSES, shard_count))
+    ranges = [list(range(i * shard_count // count, (i + 1) * shard_count // count)) for i in range(count)]
+    print(f"Starting {count} shard worker(s) for {shard_count} shard(s)")
+
+    def spawn(index: int) -> subprocess.Popen:
+        env = dict(
+            os.environ,
+            SHARD_MODE="worker",
+            SHARD_COUNT=str(shard_count),
+            SHARD_IDS=",".join(map(str, ranges[index])),
+            PORT=str(HEALTH_PORT + 2 * index)
+        )
+        # Own session, so a Ctrl+C in the terminal reaches only the supervisor, which forwards a
+        # single SIGINT below; a second one would cut the worker's shutdown short
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env, start_new_session=True)
+
+    workers = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(count):
+        if index and not stopping:
+            time.sleep(5 * len(ranges[index - 1]))
+        workers[index] = spawn(index)
+    while not stopping:
+        time.sleep(1)
+        for index, process in workers.items():
+            if process.poll() is not None and not stopping:
+                print(f"⚠️ Shard worker {index} (shards {ranges[index]}) exited with {process.returncode}, restarting")
+                time.sleep(5)
+                workers[index] = spawn(index)
+    # Client.run only closes the bot (flushing queued DMs, log posts and store writes) on
+    # KeyboardInterrupt, so workers are stopped with SIGINT rather than SIGTERM
+    for process in workers.values():
+        process.send_signal(signal.SIGINT)
+    deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+    for index, process in workers.items():
+        try:
+            process.wait(max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            print(f"⚠️ Shard worker {index} didn't shut down within {WORKER_STOP_TIMEOUT}s, killing it")
+            process.kill()
+            process.wait()
+
+if __name__ == "__main__":
+    if SHARD_MODE == "processes":
+        run_shard_workers()
+    else:
+        bot.run(TOKEN)